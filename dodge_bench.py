@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# benchmarks run without a window; SDL's dummy driver must be picked before pygame starts
+os.environ.setdefault("DODGE_HEADLESS", "1")
+
+import pygame  # noqa: E402
+
+import dodge_core  # noqa: E402
+import dodge_game_v2 as dg  # noqa: E402
+
+BENCH_VERSION = 1
+
+
+# -------------------------
+# Scenarios
+# -------------------------
+# setup(game) puts a fresh seeded Game into the scenario's state; the optional
+# hook(game, tick) runs before every measured tick, outside the timed region.
+# The level scenarios stay on their level while warmup + ticks <= 600 (10 s of game time).
+WEAVE = [dg.IN_LEFT] * 40 + [dg.IN_RIGHT] * 80 + [dg.IN_LEFT] * 40
+
+
+def start_play(game, t=0.0):
+    game.step(dg.IN_START, 0.0)
+    g = game.game
+    g["t"] = t
+    g["invincible_until"] = float("inf")  # never dies, so every tick measures the same state
+    game.input_source = dodge_core.ScriptedInput(WEAVE, loop=True)
+
+
+def setup_menu(game):
+    game.input_source = lambda: 0
+
+
+def setup_level1(game):
+    start_play(game)
+
+
+def setup_level15(game):
+    # level 15: obs_interval is at its 0.18 s floor
+    start_play(game, t=140.0)
+
+
+def setup_particles(game):
+    start_play(game)
+
+
+def hook_particles(game, tick):
+    # keep ~2000 particles alive
+    pool = game.game["particles"]
+    missing = 2000 - len(pool)
+    if missing > 0:
+        dg.emit_particles(pool, dg.WIDTH // 2, dg.HEIGHT // 2, dg.GOLD_INNER, count=missing, power=260)
+
+
+def hook_shield_hit(game, tick):
+    # an absorbed hit every 15 ticks: shake and flash never fully decay
+    if tick % 15 == 0:
+        g = game.game
+        g["shield"] = 2
+        game.apply_hit()
+        g["invincible_until"] = float("inf")
+
+
+SCENARIOS = {
+    "menu_idle": (setup_menu, None),
+    "level1": (setup_level1, None),
+    "level15": (setup_level15, None),
+    "particles_2000": (setup_particles, hook_particles),
+    "shield_hit": (setup_level1, hook_shield_hit),
+}
+
+
+# -------------------------
+# Runner
+# -------------------------
+def stats_ms(samples):
+    ms = np.asarray(samples) * 1e3
+    return {
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+    }
+
+
+def run_scenario(name, ticks, warmup, seed=1, vectorized=False, dt=1.0 / dg.FPS):
+    setup, hook = SCENARIOS[name]
+    game = dg.Game(persist=False, seed=seed, vectorized=vectorized, spawn_thread=False)
+    setup(game)
+    update_s, render_s = [], []
+    perf = time.perf_counter
+    for tick in range(warmup + ticks):
+        if hook is not None:
+            hook(game, tick)
+        t0 = perf()
+        game.update(dt)
+        t1 = perf()
+        game.render()
+        t2 = perf()
+        if tick >= warmup:
+            update_s.append(t1 - t0)
+            render_s.append(t2 - t1)
+    return {"update": stats_ms(update_s), "render": stats_ms(render_s), "counts": game.counts()}
+
+
+def best_of(name, repeat, ticks, warmup, seed=1, vectorized=False):
+    # per phase, the run with the lowest p50 (the least disturbed by the machine)
+    runs = [run_scenario(name, ticks, warmup, seed, vectorized) for _ in range(repeat)]
+    best = dict(runs[0])
+    for phase in ("update", "render"):
+        best[phase] = min((r[phase] for r in runs), key=lambda s: s["p50_ms"])
+    return best
+
+
+def run_suite(names, ticks, warmup, seed=1, vectorized=False, repeat=3):
+    return {
+        "meta": {
+            "bench_version": BENCH_VERSION,
+            "rules_version": dodge_core.RULES_VERSION,
+            "ticks": ticks,
+            "warmup": warmup,
+            "repeat": repeat,
+            "seed": seed,
+            "vectorized": vectorized,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "scenarios": {name: best_of(name, repeat, ticks, warmup, seed, vectorized) for name in names},
+    }
+
+
+def compare(result, baseline, threshold, min_delta_ms=0.02):
+    # p50 per scenario and phase against the baseline; slower by more than
+    # threshold (a fraction) and by at least min_delta_ms is a regression
+    lines, regressions = [], 0
+    for name, cur in result["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            lines.append(f"{name:<16}(no baseline)")
+            continue
+        for phase in ("update", "render"):
+            now, then = cur[phase]["p50_ms"], base[phase]["p50_ms"]
+            ratio = now / then if then > 0 else 1.0
+            flag = ""
+            if ratio > 1.0 + threshold and now - then >= min_delta_ms:
+                flag = "  REGRESSION"
+                regressions += 1
+            lines.append(f"{name:<16}{phase:<8}{then:9.3f} -> {now:9.3f} ms  ({ratio - 1.0:+.1%}){flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dodge Game v2 update/render benchmarks")
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--ticks", type=int, default=480, help="measured ticks per scenario")
+    parser.add_argument("--warmup", type=int, default=120, help="unmeasured ticks first")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario, best p50 kept")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--out", metavar="PATH", help="write the results JSON here (default: stdout)")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a stored result")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p50 slowdown vs baseline (0.10 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.02, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    names = args.scenarios or list(SCENARIOS)
+    result = run_suite(names, args.ticks, args.warmup, args.seed, args.vectorized, args.repeat)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        lines, regressions = compare(result, baseline, args.threshold, args.min_delta_ms)
+        print("\n".join(lines), file=sys.stderr)
+        if regressions:
+            print(f"{regressions} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
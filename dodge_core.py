@@ -0,0 +1,2024 @@
+import argparse
+import json
+import math
+import random
+import struct
+import sys
+import threading
+import time
+import weakref
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+
+# -------------------------
+# Screen / Basic
+# -------------------------
+# the rules only need the playfield size; drawing it is dodge_game_v2's job
+WIDTH, HEIGHT = 900, 650
+FPS = 60
+
+# bump whenever a change alters run outcomes (memoized bot-farm results key on it)
+RULES_VERSION = 3
+
+np = None  # NumPy, imported by need_numpy(): list-store simulations never load it
+
+
+def need_numpy():
+    global np
+    if np is None:
+        import numpy
+
+        np = numpy
+    return np
+
+
+def clamp(v, lo, hi):
+    return max(lo, min(hi, v))
+
+
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+
+# -------------------------
+# Input (one bitmask per update)
+# -------------------------
+IN_LEFT = 1 << 0
+IN_RIGHT = 1 << 1
+IN_DASH = 1 << 2
+IN_PAUSE = 1 << 3
+IN_RESTART = 1 << 4
+IN_MENU = 1 << 5
+IN_START = 1 << 6
+IN_QUIT = 1 << 7
+MOVE_BITS = IN_LEFT | IN_RIGHT | IN_DASH
+
+
+@dataclass(frozen=True)
+class TickInput:
+    # one update's input as named buttons; mask is the IN_* form the rules, the
+    # recorder and replays work on. An input source may return either.
+    left: bool = False
+    right: bool = False
+    dash: bool = False
+    pause: bool = False
+    restart: bool = False
+    menu: bool = False
+    start: bool = False
+    quit: bool = False
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls(*(bool(mask & (1 << i)) for i in range(8)))
+
+    @property
+    def mask(self):
+        bits = (self.left, self.right, self.dash, self.pause, self.restart, self.menu, self.start, self.quit)
+        return sum(1 << i for i, down in enumerate(bits) if down)
+
+
+def input_mask(inp):
+    # an input source's value (IN_* mask or TickInput) as a mask
+    return inp.mask if isinstance(inp, TickInput) else inp
+
+
+class ScriptedInput:
+    # feeds a fixed list of input masks, one per update, instead of a player
+    def __init__(self, frames, loop=False):
+        self.frames = list(frames)
+        self.loop = loop
+        self.i = 0
+
+    def __call__(self):
+        if self.i >= len(self.frames):
+            if not (self.loop and self.frames):
+                return 0
+            self.i = 0
+        mask = self.frames[self.i]
+        self.i += 1
+        return mask
+
+
+def demo_script():
+    # start, weave left/right with a dash each way, restart after a game over
+    sweep_l = [IN_LEFT] * 50 + [IN_LEFT | IN_DASH] + [IN_LEFT] * 10
+    sweep_r = [IN_RIGHT] * 50 + [IN_RIGHT | IN_DASH] + [IN_RIGHT] * 10
+    return [IN_START] + sweep_l + sweep_r + [0, IN_RESTART]
+
+
+# -------------------------
+# Game objects
+# -------------------------
+class Rect:
+    # the integer rectangle the rules need: pygame.Rect's fields and colliderect
+    # (strict edges), so the simulation runs without pygame. Drawing converts.
+    __slots__ = ("x", "y", "w", "h")
+
+    def __init__(self, x, y, w, h):
+        self.x, self.y, self.w, self.h = x, y, w, h
+
+    def __repr__(self):
+        return f"Rect({self.x}, {self.y}, {self.w}, {self.h})"
+
+    @property
+    def width(self):
+        return self.w
+
+    @property
+    def height(self):
+        return self.h
+
+    @property
+    def left(self):
+        return self.x
+
+    @property
+    def top(self):
+        return self.y
+
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @property
+    def centerx(self):
+        return self.x + self.w // 2
+
+    @property
+    def centery(self):
+        return self.y + self.h // 2
+
+    @property
+    def center(self):
+        return self.x + self.w // 2, self.y + self.h // 2
+
+    def update(self, x, y, w, h):
+        self.x, self.y, self.w, self.h = x, y, w, h
+
+    def colliderect(self, other):
+        return (
+            self.x < other.x + other.w
+            and other.x < self.x + self.w
+            and self.y < other.y + other.h
+            and other.y < self.y + self.h
+        )
+
+
+# eq=False: identity equality/hash, so RowGrid can file and remove exact objects
+@dataclass(eq=False)
+class Obstacle:
+    rect: Rect
+    speed: float
+    amp: float
+    freq: float
+    phase: float
+    base_x: float
+    row: int = -1  # RowGrid row
+    y: float = field(init=False)  # exact y; rect.y is its truncation
+    prev_x: int = field(init=False)  # position before the last tick (render interpolation, sweeps)
+    prev_y: float = field(init=False)
+    y0: float = field(init=False)  # spawn y
+    warp0: float = field(init=False, default=0.0)  # world clock at spawn (Sim sets it)
+    # (w, h, speed, amp, freq, phase, base_x, y0, warp0): fixed at spawn, shared by every snapshot
+    spec: tuple = field(init=False, default=None, repr=False)
+
+    def __post_init__(self):
+        self.y = self.prev_y = self.y0 = float(self.rect.y)
+        self.prev_x = self.rect.x
+
+    def reuse(self, x, y, w, h, speed, amp, freq, phase, base_x):
+        # re-initialize a pooled obstacle in place (same state as a fresh one)
+        self.rect.update(x, y, w, h)
+        self.speed, self.amp, self.freq, self.phase, self.base_x = speed, amp, freq, phase, base_x
+        self.row = -1
+        self.warp0 = 0.0
+        self.spec = None
+        self.__post_init__()
+        return self
+
+    def freeze(self):
+        if self.spec is None:
+            r = self.rect
+            self.spec = (r.w, r.h, self.speed, self.amp, self.freq, self.phase, self.base_x, self.y0, self.warp0)
+        return (self.spec, self.rect.x, self.rect.y, self.y, self.prev_x, self.prev_y)
+
+    def thaw(self, frozen):
+        spec, x, ry, y, prev_x, prev_y = frozen
+        w, h, speed, amp, freq, phase, base_x, y0, warp0 = spec
+        self.reuse(x, ry, w, h, speed, amp, freq, phase, base_x)
+        self.y, self.prev_x, self.prev_y, self.y0, self.warp0, self.spec = y, prev_x, prev_y, y0, warp0, spec
+        return self
+
+    def update(self, warp, t):
+        # closed form on the world clock: exact however many ticks have passed
+        self.prev_x, self.prev_y = self.rect.x, self.y
+        self.y = self.y0 + self.speed * (warp - self.warp0)
+        self.rect.y = int(self.y)
+        if self.amp > 0:
+            # side-to-side wobble
+            self.rect.x = int(self.base_x + math.sin((t + self.phase) * self.freq) * self.amp)
+
+
+@dataclass(eq=False)
+class Coin:
+    rect: Rect
+    speed: float
+    row: int = -1
+    y: float = field(init=False)
+    prev_x: int = field(init=False)
+    prev_y: float = field(init=False)
+    y0: float = field(init=False)
+    warp0: float = field(init=False, default=0.0)
+    spec: tuple = field(init=False, default=None, repr=False)  # (w, h, speed, y0, warp0)
+
+    def __post_init__(self):
+        self.y = self.prev_y = self.y0 = float(self.rect.y)
+        self.prev_x = self.rect.x
+
+    def reuse(self, x, y, w, h, speed):
+        self.rect.update(x, y, w, h)
+        self.speed = speed
+        self.row = -1
+        self.warp0 = 0.0
+        self.spec = None
+        self.__post_init__()
+        return self
+
+    def freeze(self):
+        if self.spec is None:
+            self.spec = (self.rect.w, self.rect.h, self.speed, self.y0, self.warp0)
+        return (self.spec, self.rect.x, self.rect.y, self.y, self.prev_x, self.prev_y)
+
+    def thaw(self, frozen):
+        spec, x, ry, y, prev_x, prev_y = frozen
+        w, h, speed, y0, warp0 = spec
+        self.reuse(x, ry, w, h, speed)
+        self.y, self.prev_x, self.prev_y, self.y0, self.warp0, self.spec = y, prev_x, prev_y, y0, warp0, spec
+        return self
+
+    def update(self, warp):
+        self.prev_y = self.y
+        self.y = self.y0 + self.speed * (warp - self.warp0)
+        self.rect.y = int(self.y)
+
+
+@dataclass(eq=False)
+class PowerUp:
+    kind: str  # "SHIELD" | "SLOW"
+    rect: Rect
+    speed: float
+    row: int = -1
+    y: float = field(init=False)
+    prev_x: int = field(init=False)
+    prev_y: float = field(init=False)
+    y0: float = field(init=False)
+    warp0: float = field(init=False, default=0.0)
+    spec: tuple = field(init=False, default=None, repr=False)  # (kind, w, h, speed, y0, warp0)
+
+    def __post_init__(self):
+        self.y = self.prev_y = self.y0 = float(self.rect.y)
+        self.prev_x = self.rect.x
+
+    def reuse(self, kind, x, y, w, h, speed):
+        self.kind = kind
+        self.rect.update(x, y, w, h)
+        self.speed = speed
+        self.row = -1
+        self.warp0 = 0.0
+        self.spec = None
+        self.__post_init__()
+        return self
+
+    def freeze(self):
+        if self.spec is None:
+            self.spec = (self.kind, self.rect.w, self.rect.h, self.speed, self.y0, self.warp0)
+        return (self.spec, self.rect.x, self.rect.y, self.y, self.prev_x, self.prev_y)
+
+    def thaw(self, frozen):
+        spec, x, ry, y, prev_x, prev_y = frozen
+        kind, w, h, speed, y0, warp0 = spec
+        self.reuse(kind, x, ry, w, h, speed)
+        self.y, self.prev_x, self.prev_y, self.y0, self.warp0, self.spec = y, prev_x, prev_y, y0, warp0, spec
+        return self
+
+    def update(self, warp):
+        self.prev_y = self.y
+        self.y = self.y0 + self.speed * (warp - self.warp0)
+        self.rect.y = int(self.y)
+
+
+class EntityPool:
+    # free list of one entity type: dead entities are kept and re-initialized with
+    # reuse() instead of allocating a new dataclass + Rect per spawn
+    def __init__(self, make):
+        self.make = make  # builds a blank entity when the free list is empty
+        self.free = []
+
+    def acquire(self):
+        return self.free.pop() if self.free else self.make()
+
+    def release(self, e):
+        self.free.append(e)
+
+    def release_all(self, entities):
+        self.free.extend(entities)
+        entities.clear()
+
+    def cull(self, entities, limit):
+        # drop entities with top >= limit in place (order kept) and recycle them
+        j = 0
+        for e in entities:
+            if e.rect.y < limit:
+                entities[j] = e
+                j += 1
+            else:
+                self.free.append(e)
+        del entities[j:]
+
+
+def entity_pools():
+    return {
+        "obstacles": EntityPool(lambda: Obstacle(Rect(0, 0, 0, 0), 0.0, 0.0, 0.0, 0.0, 0.0)),
+        "coins": EntityPool(lambda: Coin(Rect(0, 0, 0, 0), 0.0)),
+        "powerups": EntityPool(lambda: PowerUp("SHIELD", Rect(0, 0, 0, 0), 0.0)),
+    }
+
+
+# -------------------------
+# Broad phase (player collision)
+# -------------------------
+ROW_H = 64
+ROW_TOP = -100  # spawns start at y = -h
+MAX_ENTITY_H = 90  # tallest entity the spawners roll (level files may go taller)
+
+
+class RowGrid:
+    # uniform grid of horizontal rows, entities filed by their top edge.
+    # spawners insert, the movement step re-files, culling/pickups remove;
+    # queries only look at the rows a rect (plus the tallest entity, max_h) can reach.
+    def __init__(self, max_h=MAX_ENTITY_H):
+        self.max_h = max_h
+        self.rows = [[] for _ in range((HEIGHT + 170 - ROW_TOP) // ROW_H + 2)]
+        self.found = []  # near() result, reused by the next call
+
+    def row_of(self, y):
+        return clamp((int(y) - ROW_TOP) // ROW_H, 0, len(self.rows) - 1)
+
+    def insert(self, e):
+        e.row = self.row_of(e.rect.y)
+        self.rows[e.row].append(e)
+
+    def update(self, e):
+        r = self.row_of(e.rect.y)
+        if r != e.row:
+            self.rows[e.row].remove(e)
+            self.rows[r].append(e)
+            e.row = r
+
+    def remove(self, e):
+        self.rows[e.row].remove(e)
+
+    def cull(self, limit):
+        # entities with top >= limit can only be in rows from row_of(limit) down;
+        # compacted in place, the pool already got them from the entity list
+        rows = self.rows
+        for r in range(self.row_of(limit), len(rows)):
+            row = rows[r]
+            if row:
+                j = 0
+                for e in row:
+                    if e.rect.y < limit:
+                        row[j] = e
+                        j += 1
+                del row[j:]
+
+    def near(self, rect: Rect):
+        return self.band(rect.top - self.max_h, rect.bottom)
+
+    def band(self, top, bottom):
+        # entities filed with their top in [top, bottom]. A copy (callers remove pickups
+        # from the grid while iterating), but always the same list: use it up before
+        # the next query on this grid
+        found = self.found
+        found.clear()
+        rows = self.rows
+        for r in range(self.row_of(top), self.row_of(bottom) + 1):
+            found.extend(rows[r])
+        return found
+
+
+def sweep_overlaps(dx0, dy0, dx1, dy1, w, h, pw, ph):
+    # a w x h box moving from offset (dx0, dy0) to (dx1, dy1) relative to a pw x ph box
+    # (straight line over the tick): do they overlap anywhere on the way?
+    # Strict edges like colliderect; true whenever the end positions collide.
+    enter, leave = -math.inf, math.inf
+    b = dx1 - dx0
+    if b:
+        s1, s2 = (-w - dx0) / b, (pw - dx0) / b
+        enter, leave = (s1, s2) if s1 < s2 else (s2, s1)
+    elif not -w < dx0 < pw:
+        return False
+    b = dy1 - dy0
+    if b:
+        s1, s2 = (-h - dy0) / b, (ph - dy0) / b
+        if s1 > s2:
+            s1, s2 = s2, s1
+        enter, leave = max(enter, s1), min(leave, s2)
+    elif not -h < dy0 < ph:
+        return False
+    return enter < leave and enter < 1.0 and leave > 0.0
+
+
+def sweep_span(a, b, lo, hi):
+    # array form of one axis of sweep_overlaps: the open s-interval where
+    # lo < a + b * s < hi (all or nothing where b == 0)
+    need_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s1 = (lo - a) / b
+        s2 = (hi - a) / b
+    enter, leave = np.minimum(s1, s2), np.maximum(s1, s2)
+    still = b == 0
+    if still.any():
+        inside = (lo < a) & (a < hi)
+        enter[still] = np.where(inside, -np.inf, np.inf)[still]
+        leave[still] = np.where(inside, np.inf, -np.inf)[still]
+    return enter, leave
+
+
+# -------------------------
+# Spawners
+# -------------------------
+# rng: a random.Random stream (the Sim's own), or the random module itself
+# pool: an EntityPool to recycle from (a new entity when None)
+def max_fall_speed(level: int) -> float:
+    # fastest entity the spawners can roll at this level (an obstacle: coins and powerups are slower)
+    return 280 + level * 20
+
+
+def roll_obstacle(level: int, rng=random) -> tuple:
+    # Obstacle.reuse() arguments of a random obstacle for this level
+    w = rng.randint(34, 90)
+    h = rng.randint(34, 90)
+    x = rng.randint(0, WIDTH - w)
+    y = -h
+
+    speed = 235 + level * 20 + rng.randint(-25, 45)
+
+    # add wobble more often at higher levels
+    wobble_chance = clamp(0.20 + level * 0.03, 0.20, 0.70)
+    if rng.random() < wobble_chance:
+        amp = rng.uniform(35, 120) * clamp(level / 6.0, 0.3, 1.0)
+        freq = rng.uniform(1.6, 3.0)
+        phase = rng.uniform(0, 10)
+    else:
+        amp, freq, phase = 0.0, 0.0, 0.0
+    return x, y, w, h, speed, amp, freq, phase, float(x)
+
+
+def roll_coin(level: int, rng=random) -> tuple:
+    size = rng.randint(22, 30)
+    x = rng.randint(0, WIDTH - size)
+    y = -size
+    speed = 250 + level * 11 + rng.randint(-10, 25)
+    return x, y, size, size, speed
+
+
+def roll_powerup(level: int, rng=random) -> tuple:
+    size = 28
+    x = rng.randint(0, WIDTH - size)
+    y = -size
+    speed = 245 + level * 9 + rng.randint(-10, 20)
+    kind = "SHIELD" if rng.random() < 0.55 else "SLOW"
+    return kind, x, y, size, size, speed
+
+
+def spawn_obstacle(level: int, rng=random, pool=None) -> Obstacle:
+    x, y, w, h, speed, amp, freq, phase, base_x = args = roll_obstacle(level, rng)
+    if pool is not None:
+        return pool.acquire().reuse(*args)
+    return Obstacle(Rect(x, y, w, h), speed, amp, freq, phase, base_x)
+
+
+def spawn_coin(level: int, rng=random, pool=None) -> Coin:
+    x, y, w, h, speed = args = roll_coin(level, rng)
+    if pool is not None:
+        return pool.acquire().reuse(*args)
+    return Coin(Rect(x, y, w, h), speed)
+
+
+def spawn_powerup(level: int, rng=random, pool=None) -> PowerUp:
+    kind, x, y, w, h, speed = args = roll_powerup(level, rng)
+    if pool is not None:
+        return pool.acquire().reuse(*args)
+    return PowerUp(kind, Rect(x, y, w, h), speed)
+
+
+# -------------------------
+# Spawn timeline
+# -------------------------
+# A spawn record is (t, key, args): at game time t, spawn one of "obstacles" /
+# "coins" / "powerups" from its reuse() arguments. Sources yield records in time order.
+def procedural_spawns(rng, dt, t=0.0):
+    # the v2 spawn timers run ahead on game time, for a game ticking at dt from
+    # its tick at time t (draws in the same order as one tick of the timers)
+    obs_timer = coin_timer = pu_timer = 0.0
+    while True:
+        level = 1 + int(t // 10)
+
+        obs_timer += dt
+        if obs_timer >= max(0.18, 0.58 - level * 0.03):
+            obs_timer = 0.0
+            yield t, "obstacles", roll_obstacle(level, rng)
+
+        coin_timer += dt
+        if coin_timer >= max(0.42, 0.95 - level * 0.02):
+            coin_timer = 0.0
+            yield t, "coins", roll_coin(level, rng)
+
+        # (rare)
+        pu_timer += dt
+        if pu_timer >= max(7.5, 13.0 - level * 0.25):
+            pu_timer = 0.0
+            yield t, "powerups", roll_powerup(level, rng)
+
+        t += dt
+
+
+def read_level(path):
+    # authored spawns from a level file, parsed line by line as they are needed:
+    #   wave <t>                                       later times are relative to t
+    #   <t> obstacle <x> <w> <h> <speed> [<amp> <freq> <phase>]
+    #   <t> coin <x> <size> <speed>
+    #   <t> shield|slow <x> <speed>
+    # '#' starts a comment. Raises ValueError (with the line number) on a bad line.
+    base = last = 0.0
+    with open(path, encoding="utf-8") as fh:
+        for num, line in enumerate(fh, 1):
+            words = line.split("#", 1)[0].split()
+            if not words:
+                continue
+            try:
+                wave = words[0] == "wave"
+                nums = [float(w) for w in words[1 if wave else 2 :]]
+                t = base if wave else base + float(words[0])
+                if not all(math.isfinite(v) for v in (t, *nums)):
+                    raise ValueError(f"non-finite number in {line.strip()!r}")
+                if wave and len(words) == 2:
+                    base = nums[0]
+                    continue
+                kind = words[1]
+                if kind == "obstacle" and len(nums) in (4, 7):
+                    x, w, h, speed = int(nums[0]), int(nums[1]), int(nums[2]), nums[3]
+                    amp, freq, phase = nums[4:] or (0.0, 0.0, 0.0)
+                    rec = t, "obstacles", (x, -h, w, h, speed, amp, freq, phase, float(x))
+                    sizes = w, h
+                elif kind == "coin" and len(nums) == 3:
+                    x, size, speed = int(nums[0]), int(nums[1]), nums[2]
+                    rec = t, "coins", (x, -size, size, size, speed)
+                    sizes = (size,)
+                elif kind in ("shield", "slow") and len(nums) == 2:
+                    speed = nums[1]
+                    rec = t, "powerups", (kind.upper(), int(nums[0]), -28, 28, 28, speed)
+                    sizes = ()
+                else:
+                    raise ValueError(f"can't read {line.strip()!r}")
+                # a zero speed never reaches the player (skip-ahead divides by it), a
+                # negative one rises forever and is never culled
+                if speed <= 0 or min(sizes, default=1) <= 0:
+                    raise ValueError(f"speed and size must be positive in {line.strip()!r}")
+            except (ValueError, IndexError) as e:
+                raise ValueError(f"{path}:{num}: {e}") from None
+            if t < last:
+                raise ValueError(f"{path}:{num}: spawn at {t:g}s comes before the one at {last:g}s")
+            last = t
+            yield rec
+
+
+def level_limits(path):
+    # (fastest fall speed, tallest entity) over a level file's records, never below the
+    # procedural level-1 speed and MAX_ENTITY_H: what skip-ahead and the broad phase
+    # must assume instead of the procedural spawners' limits
+    speed, h = max_fall_speed(1), MAX_ENTITY_H
+    for _, key, args in read_level(path):
+        if key == "powerups":
+            args = args[1:]  # (kind, x, y, w, h, speed)
+        speed, h = max(speed, args[4]), max(h, args[3])
+    return speed, h
+
+
+class SpawnTimeline:
+    # spawn records of one run, pulled from a source iterator in chunks by a background
+    # thread that stays AHEAD records past the furthest read; the tick loop only indexes
+    # the list. Records never change, so snapshots and lookahead copies share a timeline.
+    # Small chunks: the thread hands the GIL back after each, so a tick never waits long.
+    CHUNK = 16
+    AHEAD = 256
+
+    def __init__(self, source, background=True):
+        self.source = source
+        self.records = []
+        self.read = 0  # furthest index asked for
+        self.done = False  # source exhausted
+        self.error = None  # raised by the source on the thread, re-raised on read
+        self.lock = threading.Lock()  # one filler at a time
+        self.hungry = threading.Event()
+        self.closed = False
+        if background:
+            threading.Thread(target=self.produce, args=(weakref.ref(self), self.hungry), daemon=True).start()
+
+    def get(self, i):
+        # record i, or None past the end of the source
+        self.read = i
+        records = self.records
+        if len(records) - i < self.AHEAD - self.CHUNK and not self.done:
+            self.hungry.set()
+        if i >= len(records):
+            with self.lock:
+                while i >= len(records) and not self.done:
+                    self.fill()  # the thread fell behind (or is off): fill here
+            if self.error is not None:
+                raise self.error
+            if i >= len(records):
+                return None
+        return records[i]
+
+    def fill(self):
+        n = len(self.records)
+        try:
+            self.records.extend(islice(self.source, self.CHUNK))
+        except Exception as e:
+            self.error = e
+            self.done = True
+            return
+        self.done = len(self.records) - n < self.CHUNK
+
+    @staticmethod
+    def produce(ref, hungry):
+        # the thread; holds the timeline weakly, so one nobody uses anymore ends it
+        while True:
+            time.sleep(0)  # let the simulation run first
+            tl = ref()
+            if tl is None or tl.closed or tl.done:
+                return
+            hungry.clear()
+            if len(tl.records) - tl.read >= tl.AHEAD:
+                del tl
+                hungry.wait(1.0)
+                continue
+            with tl.lock:
+                if not tl.done:
+                    tl.fill()
+            del tl
+
+    def close(self):
+        # stop the thread; reads still work (filled on demand)
+        self.closed = True
+        self.hungry.set()
+
+
+# -------------------------
+# Vectorized entity store (--vectorized)
+# -------------------------
+POWERUP_KINDS = ("SHIELD", "SLOW")
+
+
+class EntityColumns:
+    # one float64 row per column, entities live in [0, n); grows by doubling
+    def __init__(self, names, capacity=64):
+        need_numpy()
+        self.index = {name: i for i, name in enumerate(names)}
+        self.data = np.zeros((len(names), capacity))
+        self.n = 0
+
+    def __getitem__(self, name):
+        return self.data[self.index[name], : self.n]
+
+    def append(self, *values):
+        if self.n == self.data.shape[1]:
+            grown = np.zeros((self.data.shape[0], self.n * 2))
+            grown[:, : self.n] = self.data
+            self.data = grown
+        self.data[:, self.n] = values
+        self.n += 1
+
+    def freeze(self):
+        return self.data[:, : self.n].copy()
+
+    def thaw(self, frozen):
+        # copy back in place; only reallocates when the snapshot is larger than capacity
+        n = frozen.shape[1]
+        if n > self.data.shape[1]:
+            self.data = np.zeros((self.data.shape[0], max(n, self.data.shape[1] * 2)))
+        self.data[:, :n] = frozen
+        self.n = n
+
+    def keep(self, mask):
+        # drop rows where mask is False (order preserved)
+        k = int(np.count_nonzero(mask))
+        if k < self.n:
+            self.data[:, :k] = self.data[:, : self.n][:, mask]
+            self.n = k
+
+    def overlaps(self, rect: Rect):
+        # colliderect against every row at once
+        x, y = self["x"], self["y"]
+        return (x < rect.right) & (rect.x < x + self["w"]) & (y < rect.bottom) & (rect.y < y + self["h"])
+
+    def rows(self, mask=None):
+        live = self.data[:, : self.n]
+        if mask is not None:
+            live = live[:, mask]
+        return live.T.tolist()
+
+
+class EntityArrays:
+    # obstacles / coins / powerups as structure-of-arrays with float positions
+    def __init__(self):
+        # px/py: position before the last tick (render interpolation, sweeps)
+        # y0/warp0: spawn y and world clock at spawn (y is closed-form in the clock)
+        self.obstacles = EntityColumns(
+            ("x", "y", "w", "h", "speed", "amp", "freq", "phase", "base_x", "px", "py", "y0", "warp0")
+        )
+        self.coins = EntityColumns(("x", "y", "w", "h", "speed", "px", "py", "y0", "warp0"))
+        self.powerups = EntityColumns(("x", "y", "w", "h", "speed", "kind", "px", "py", "y0", "warp0"))
+
+    def add_obstacle(self, o: Obstacle):
+        r = o.rect
+        self.obstacles.append(
+            r.x, r.y, r.width, r.height, o.speed, o.amp, o.freq, o.phase, o.base_x, r.x, r.y, o.y0, o.warp0
+        )
+
+    def add_coin(self, c: Coin):
+        r = c.rect
+        self.coins.append(r.x, r.y, r.width, r.height, c.speed, r.x, r.y, c.y0, c.warp0)
+
+    def add_powerup(self, pu: PowerUp):
+        r = pu.rect
+        kind = POWERUP_KINDS.index(pu.kind)
+        self.powerups.append(r.x, r.y, r.width, r.height, pu.speed, kind, r.x, r.y, pu.y0, pu.warp0)
+
+    def add(self, key, e):
+        # e of kind "obstacles" / "coins" / "powerups"
+        if key == "obstacles":
+            self.add_obstacle(e)
+        elif key == "coins":
+            self.add_coin(e)
+        else:
+            self.add_powerup(e)
+
+    def move(self, warp, t):
+        for cols in (self.obstacles, self.coins, self.powerups):
+            if cols.n:
+                np.copyto(cols["px"], cols["x"])
+                np.copyto(cols["py"], cols["y"])
+                # y0 + speed * (warp - warp0), same operation order as the entity classes
+                y = cols["y"]
+                np.subtract(warp, cols["warp0"], out=y)
+                y *= cols["speed"]
+                y += cols["y0"]
+
+        o = self.obstacles
+        if o.n:
+            amp = o["amp"]
+            wob = amp > 0
+            if wob.any():
+                # side-to-side wobble
+                o["x"][wob] = (o["base_x"] + np.sin((t + o["phase"]) * o["freq"]) * amp)[wob]
+
+    def cull(self):
+        self.obstacles.keep(self.obstacles["y"] < HEIGHT + 170)
+        self.coins.keep(self.coins["y"] < HEIGHT + 140)
+        self.powerups.keep(self.powerups["y"] < HEIGHT + 160)
+
+    def take_coins(self, player: Rect):
+        # remove coins touching the player, return their centers
+        hit = self.coins.overlaps(player)
+        if not hit.any():
+            return []
+        taken = self.coins.rows(hit)
+        self.coins.keep(~hit)
+        return [(int(x) + int(w) // 2, int(y) + int(h) // 2) for x, y, w, h, *_ in taken]
+
+    def take_powerups(self, player: Rect):
+        hit = self.powerups.overlaps(player)
+        if not hit.any():
+            return []
+        taken = self.powerups.rows(hit)
+        self.powerups.keep(~hit)
+        return [
+            (POWERUP_KINDS[int(kind)], int(x) + int(w) // 2, int(y) + int(h) // 2)
+            for x, y, w, h, _, kind, *_ in taken
+        ]
+
+    def sweep_hits_obstacle(self, player: Rect, prev_x):
+        # sweep_overlaps against every obstacle; prev_x: the player's x before the tick
+        o = self.obstacles
+        if not o.n:
+            return False
+        dx0, dy0 = o["px"] - prev_x, o["py"] - player.y
+        ex, lx = sweep_span(dx0, (o["x"] - player.x) - dx0, -o["w"], player.w)
+        ey, ly = sweep_span(dy0, (o["y"] - player.y) - dy0, -o["h"], player.h)
+        enter, leave = np.maximum(ex, ey), np.minimum(lx, ly)
+        return bool(((enter < leave) & (enter < 1.0) & (leave > 0.0)).any())
+
+
+# -------------------------
+# Frame profiler (--profile export; dodge_game_v2 adds the F3 overlay)
+# -------------------------
+class FrameProfiler:
+    # lap-style phase timer: lap(phase) charges the time since the previous lap to
+    # phase (summed when a phase runs more than once per frame, e.g. several ticks).
+    # Disabled, every call returns at once.
+    HISTORY = 240  # frames kept for percentiles
+
+    def __init__(self, export_path=None):
+        self.out = open(export_path, "w", encoding="utf-8") if export_path else None
+        self.enabled = self.out is not None
+        self.frames = deque(maxlen=self.HISTORY)  # (total seconds, {phase: seconds})
+        self.phases = {}
+        self.count = 0
+        self.start_t = self.last_t = 0.0
+
+    def start(self):
+        if not self.enabled:
+            return
+        self.phases = {}
+        self.start_t = self.last_t = time.perf_counter()
+
+    def lap(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last_t)
+        self.last_t = now
+
+    def end(self, counts):
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.start_t
+        self.frames.append((total, self.phases))
+        self.count += 1
+        if self.out is not None:
+            rec = {"frame": self.count, "ms": round(total * 1e3, 4)}
+            rec["phases"] = {k: round(v * 1e3, 4) for k, v in self.phases.items()}
+            rec.update(counts)
+            self.out.write(json.dumps(rec) + "\n")
+
+    def close(self):
+        if self.out is not None:
+            self.out.close()
+            self.out = None
+
+    def percentiles(self, values):
+        vals = sorted(values)
+        n = len(vals)
+        return [vals[min(n - 1, int(q * n))] * 1e3 for q in (0.50, 0.95, 0.99)]
+
+
+# -------------------------
+# Input recording / replay
+# -------------------------
+REPLAY_MAGIC = b"DGRP"
+REPLAY_VERSION = 2
+REPLAY_HEADER = struct.Struct("<4sBBHQdI")  # magic, version, flags, rules version, seed, dt, checkpoint interval
+CHECKPOINT_TICKS = 60
+SEED_LIMIT = 2**32  # seeds are 0 <= seed < SEED_LIMIT (fresh ones are drawn from this range too)
+
+
+def parse_seed(text):
+    # argparse type for --seed: a negative seed fails in NumPy's RNG and in the header's Q
+    seed = int(text)
+    if not 0 <= seed < SEED_LIMIT:
+        raise argparse.ArgumentTypeError(f"seed must be in 0..{SEED_LIMIT - 1}, got {seed}")
+    return seed
+
+
+def write_varint(buf: bytearray, n):
+    while n >= 0x80:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def read_varint(data, pos):
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+class InputRecorder:
+    # per-tick input masks, run-length encoded, plus a state checksum chained over
+    # every tick and stored every CHECKPOINT_TICKS ticks
+    def __init__(self, path, game, dt):
+        self.path = Path(path)
+        self.game = game
+        self.dt = dt
+        self.runs = []  # [mask, count]
+        self.checkpoints = []
+        self.crc = 0
+        self.ticks = 0
+
+    def record(self, mask):
+        if self.runs and self.runs[-1][0] == mask:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([mask, 1])
+        self.crc = self.game.checksum(self.crc)
+        self.ticks += 1
+        if self.ticks % CHECKPOINT_TICKS == 0:
+            self.checkpoints.append(self.crc)
+
+    def save(self):
+        flags = 1 if self.game.vectorized else 0
+        buf = bytearray(
+            REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, flags, RULES_VERSION, self.game.seed, self.dt, CHECKPOINT_TICKS)
+        )
+        write_varint(buf, len(self.runs))
+        for mask, count in self.runs:
+            buf.append(mask)
+            write_varint(buf, count)
+        write_varint(buf, len(self.checkpoints))
+        buf += struct.pack(f"<{len(self.checkpoints)}I", *self.checkpoints)
+        self.path.write_bytes(bytes(buf))
+
+
+def load_replay(path):
+    data = Path(path).read_bytes()
+    magic, version, flags, rules, seed, dt, every = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path}: not a v{REPLAY_VERSION} replay")
+    if rules != RULES_VERSION:
+        raise ValueError(f"{path}: recorded under rules v{rules}, this build plays v{RULES_VERSION}")
+    pos = REPLAY_HEADER.size
+    n_runs, pos = read_varint(data, pos)
+    runs = []
+    for _ in range(n_runs):
+        mask = data[pos]
+        count, pos = read_varint(data, pos + 1)
+        runs.append((mask, count))
+    n_checks, pos = read_varint(data, pos)
+    checkpoints = list(struct.unpack_from(f"<{n_checks}I", data, pos))
+    return {
+        "seed": seed,
+        "dt": dt,
+        "vectorized": bool(flags & 1),
+        "every": every,
+        "runs": runs,
+        "checkpoints": checkpoints,
+    }
+
+
+class ReplayInput:
+    # expands recorded runs back into one mask per update
+    def __init__(self, runs):
+        self.masks = (mask for mask, count in runs for _ in range(count))
+
+    def __call__(self):
+        return next(self.masks, 0)
+
+
+def replay_file(path):
+    # re-simulate a recording at full speed, verifying every checkpoint
+    rec = load_replay(path)
+    game = Sim(input_source=ReplayInput(rec["runs"]), vectorized=rec["vectorized"], seed=rec["seed"])
+    dt, every, checkpoints = rec["dt"], rec["every"], rec["checkpoints"]
+    ticks = sum(count for _, count in rec["runs"])
+    crc = 0
+    start = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        game.update(dt)
+        crc = game.checksum(crc)
+        if tick % every == 0 and crc != checkpoints[tick // every - 1]:
+            return {"path": str(path), "ok": False, "ticks": tick}
+    return {"path": str(path), "ok": True, "ticks": ticks, "wall_seconds": time.perf_counter() - start}
+
+
+# state the checksum covers (particles and the starfield are cosmetic and left out)
+CHECKSUM_FLOATS = (
+    "player_x", "vel_x", "dash_until", "dash_cd_until", "invincible_until", "slow_until",
+    "combo_timer", "t", "warp", "spawn_at", "shake", "flash",
+)  # fmt: skip
+CHECKSUM_INTS = ("hp", "shield", "score", "combo", "spawn_next", "paused", "game_over")
+CHECKSUM_HEAD = struct.Struct(f"<{len(CHECKSUM_FLOATS)}d{len(CHECKSUM_INTS) + 4}q")
+
+
+# -------------------------
+# Snapshots (rollback / lookahead / instant retry)
+# -------------------------
+@dataclass(frozen=True)
+class GameSnapshot:
+    # everything step() reads; particles and the starfield are cosmetic and left out
+    state: str
+    edges: tuple  # p_was, shift_was, space_was
+    scalars: tuple  # values of Sim.scalar_keys
+    player: int  # player rect x
+    rng: tuple  # Sim.rng state
+    timeline: object  # the run's SpawnTimeline (shared, records never change)
+    # list store: per kind a tuple of Entity.freeze() tuples (specs shared across snapshots);
+    # vectorized: per kind a copy of the live EntityColumns data
+    entities: tuple
+
+
+# -------------------------
+# Simulation (v2 rules)
+# -------------------------
+def no_input():
+    return 0
+
+
+class Sim:
+    # the game rules on plain data: no display, no keyboard, no pygame. update() reads
+    # one input from input_source per tick; dodge_game_v2.Game subclasses this to add
+    # the keyboard, particles, starfield, rendering and the saved records through the
+    # hooks at the end (effect, update_background, update_particles, end_run, menu_keys).
+    def __init__(self, input_source=None, vectorized=False, seed=None, level=None, spawn_thread=False, profiler=None):
+        # input_source: callable returning an IN_* mask or a TickInput (all zeros by default)
+        # vectorized: keep obstacles/coins/powerups in an EntityArrays store (needs NumPy)
+        # seed: fixes every random stream of this game (a fresh one when None)
+        # level: spawn from this level file (see read_level) instead of procedurally
+        # spawn_thread: pre-roll spawns on a background thread; it runs while a frame-capped
+        #               loop sleeps, uncapped simulations are faster filling inline
+        # profiler: a FrameProfiler to charge the tick phases to (a disabled one when None)
+        self.seed = seed if seed is not None else random.randrange(SEED_LIMIT)
+        self.rng = random.Random(f"{self.seed}/spawn")  # gameplay: seeds each run's spawn timeline
+        self.recorder = None  # InputRecorder, fed once per update
+        self.input_source = input_source or no_input
+        self.vectorized = vectorized
+        self.level = level
+        self.level_limits = level_limits(level) if level is not None else None
+        self.spawn_thread = spawn_thread
+        self.timeline = None  # the last SpawnTimeline this game made (its thread is ours to stop)
+        self.pools = entity_pools()  # recycled obstacles / coins / powerups
+        self.profiler = profiler or FrameProfiler()
+        # whether the last tick moved the world / background (else render at alpha 1)
+        self.world_moved = False
+        self.bg_moved = False
+        self.best_time = 0.0
+        self.reset_all()
+        # game-dict keys holding plain numbers/flags (what a snapshot copies by value)
+        self.scalar_keys = tuple(k for k, v in self.game.items() if isinstance(v, (int, float)))
+
+    def reset_all(self):
+        self.state = "MENU"  # MENU / PLAY
+        self.game = self.reset_game()
+
+        # input edge tracking
+        self.p_was = False
+        self.shift_was = False
+        self.space_was = False
+
+    def reset_game(self):
+        player = Rect(WIDTH // 2 - 25, HEIGHT - 95, 50, 50)
+        player_x = float(player.x)  # exact x; player.x is its truncation
+
+        # Movement smoothing (accel)
+        player_speed = 310.0
+        vel_x = 0.0
+        accel = 2600.0
+        friction = 3600.0
+
+        # Dash
+        dash_speed = 740.0
+        dash_duration = 0.12
+        dash_cooldown = 0.55
+        dash_until = 0.0
+        dash_cd_until = 0.0
+
+        # Core
+        hp = 3
+        invincible_until = 0.0
+
+        # v2 powerups
+        shield = 0  # hit buffer
+        slow_until = 0.0
+
+        # scoring
+        score = 0
+        combo = 0
+        combo_timer = 0.0
+        combo_keep = 2.0
+
+        # run stats
+        hits = 0  # includes shield-absorbed hits
+        max_combo = 0
+
+        t = 0.0
+        warp = 0.0  # world clock: t slowed down by SLOW
+
+        obstacles = []
+        coins = []
+        powerups = []
+        arrays = EntityArrays() if self.vectorized else None
+        max_h = self.spawn_limits(1)[1]
+        grids = {"obstacles": RowGrid(max_h), "coins": RowGrid(max_h), "powerups": RowGrid(max_h)}
+
+        # spawns: made on the first tick (the timeline needs dt), next record to read and its time
+        timeline = None
+        spawn_next = 0
+        spawn_at = -math.inf
+
+        paused = False
+        game_over = False
+
+        # screen shake / flash
+        shake = 0.0
+        flash = 0.0
+
+        return {
+            "player": player,
+            "player_x": player_x,
+            "player_prev_x": player_x,
+            "player_speed": player_speed,
+            "vel_x": vel_x,
+            "accel": accel,
+            "friction": friction,
+            "dash_speed": dash_speed,
+            "dash_duration": dash_duration,
+            "dash_cooldown": dash_cooldown,
+            "dash_until": dash_until,
+            "dash_cd_until": dash_cd_until,
+            "hp": hp,
+            "invincible_until": invincible_until,
+            "shield": shield,
+            "slow_until": slow_until,
+            "score": score,
+            "combo": combo,
+            "combo_timer": combo_timer,
+            "combo_keep": combo_keep,
+            "hits": hits,
+            "max_combo": max_combo,
+            "t": t,
+            "warp": warp,
+            "obstacles": obstacles,
+            "coins": coins,
+            "powerups": powerups,
+            "arrays": arrays,
+            "grids": grids,
+            "timeline": timeline,
+            "spawn_next": spawn_next,
+            "spawn_at": spawn_at,
+            "paused": paused,
+            "game_over": game_over,
+            "shake": shake,
+            "flash": flash,
+        }
+
+    def close(self):
+        # save the recording, stop the timeline thread and the profiler export
+        if self.recorder is not None:
+            self.recorder.save()
+            self.recorder = None
+        if self.timeline is not None:
+            self.timeline.close()
+        self.profiler.close()
+
+    def quit(self):
+        self.close()
+        sys.exit()
+
+    def checksum(self, crc=0):
+        # crc32 of the simulation state, chained onto crc
+        g = self.game
+        crc = zlib.crc32(
+            CHECKSUM_HEAD.pack(
+                *[g[k] for k in CHECKSUM_FLOATS],
+                *[int(g[k]) for k in CHECKSUM_INTS],
+                self.state == "PLAY",
+                self.p_was,
+                self.shift_was,
+                self.space_was,
+            ),
+            crc,
+        )
+        arrays = g["arrays"]
+        if arrays is not None:
+            for cols in (arrays.obstacles, arrays.coins, arrays.powerups):
+                crc = zlib.crc32(cols.data[:, : cols.n].tobytes(), crc)
+        else:
+            for key in ("obstacles", "coins", "powerups"):
+                pos = [v for e in g[key] for v in (e.rect.x, e.rect.y, e.rect.w, e.rect.h)]
+                crc = zlib.crc32(struct.pack(f"<{len(pos)}i", *pos), crc)
+        return crc
+
+    def snapshot(self) -> GameSnapshot:
+        g = self.game
+        arrays = g["arrays"]
+        if arrays is not None:
+            entities = (arrays.obstacles.freeze(), arrays.coins.freeze(), arrays.powerups.freeze())
+        else:
+            entities = tuple(tuple(e.freeze() for e in g[key]) for key in ("obstacles", "coins", "powerups"))
+        return GameSnapshot(
+            self.state,
+            (self.p_was, self.shift_was, self.space_was),
+            tuple(g[k] for k in self.scalar_keys),
+            g["player"].x,
+            self.rng.getstate(),
+            g["timeline"],
+            entities,
+        )
+
+    def restore(self, snap: GameSnapshot):
+        # a snapshot can be restored any number of times; an active recorder is not
+        # rewound, so a recording that spans a restore will not replay
+        g = self.game
+        self.state = snap.state
+        self.p_was, self.shift_was, self.space_was = snap.edges
+        g.update(zip(self.scalar_keys, snap.scalars))
+        g["player"].x = snap.player
+        self.rng.setstate(snap.rng)
+        g["timeline"] = snap.timeline
+        arrays = g["arrays"]
+        if arrays is not None:
+            for cols, frozen in zip((arrays.obstacles, arrays.coins, arrays.powerups), snap.entities):
+                cols.thaw(frozen)
+        else:
+            for key, frozen in zip(("obstacles", "coins", "powerups"), snap.entities):
+                pool, entities, grid = self.pools[key], g[key], g["grids"][key]
+                for row in grid.rows:
+                    row.clear()
+                pool.release_all(entities)
+                for fz in frozen:
+                    e = pool.acquire().thaw(fz)
+                    entities.append(e)
+                    grid.insert(e)
+        self.world_moved = self.bg_moved = True
+
+    def boxes(self, key):
+        # (x, y, w, h) of every live "obstacles" / "coins" / "powerups" entity, either store
+        arrays = self.game["arrays"]
+        if arrays is not None:
+            cols = getattr(arrays, key)
+            return list(zip(cols["x"].tolist(), cols["y"].tolist(), cols["w"].tolist(), cols["h"].tolist()))
+        return [(e.rect.x, e.rect.y, e.rect.w, e.rect.h) for e in self.game[key]]
+
+    def counts(self):
+        arrays = self.game["arrays"]
+        if arrays is not None:
+            sizes = (arrays.obstacles.n, arrays.coins.n, arrays.powerups.n)
+        else:
+            sizes = (len(self.game["obstacles"]), len(self.game["coins"]), len(self.game["powerups"]))
+        return dict(zip(("obstacles", "coins", "powerups"), sizes))
+
+    def world_speed_mul(self):
+        # SLOW powerup effect
+        now_t = self.game["t"]
+        if now_t < self.game["slow_until"]:
+            # ease in/out
+            remain = self.game["slow_until"] - now_t
+            t = clamp(remain / 3.0, 0.0, 1.0)
+            return lerp(0.55, 1.0, 1.0 - t)  # slower near the start, back to 1
+        return 1.0
+
+    def update_best(self):
+        # True when this tick set a new best time (kept in memory; Game saves it)
+        g = self.game
+        if (not g["game_over"]) and (g["t"] > self.best_time):
+            self.best_time = g["t"]
+            return True
+        return False
+
+    def apply_hit(self):
+        g = self.game
+        g["hits"] += 1
+
+        if g["shield"] > 0:
+            g["shield"] -= 1
+            g["invincible_until"] = g["t"] + 0.55
+            g["shake"] = max(g["shake"], 10.0)
+            g["flash"] = max(g["flash"], 0.18)
+            self.effect("shield_hit", g["player"].centerx, g["player"].centery)
+            return
+
+        g["hp"] -= 1
+        g["invincible_until"] = g["t"] + 0.85
+        g["shake"] = max(g["shake"], 14.0)
+        g["flash"] = max(g["flash"], 0.22)
+
+        self.effect("hit", g["player"].centerx, g["player"].centery)
+        g["combo"] = max(0, g["combo"] - 2)
+        g["combo_timer"] = g["combo_keep"] * 0.5 if g["combo"] > 0 else 0.0
+
+        if g["hp"] <= 0:
+            g["game_over"] = True
+            self.end_run()
+
+    def collect_coin(self, cx, cy, level):
+        g = self.game
+        g["combo"] += 1
+        g["max_combo"] = max(g["max_combo"], g["combo"])
+        g["combo_timer"] = g["combo_keep"]
+        mult = 1 + min(g["combo"] // 5, 6)
+        # small level scaling
+        g["score"] += int(10 * mult * (1.0 + level * 0.06))
+        g["shake"] = max(g["shake"], 3.0)
+        self.effect("coin", cx, cy)
+
+    def collect_powerup(self, kind, cx, cy, level):
+        g = self.game
+        if kind == "SHIELD":
+            g["shield"] = min(2, g["shield"] + 1)
+            g["score"] += 80 + level * 8
+            self.effect("shield", cx, cy)
+        else:
+            g["slow_until"] = max(g["slow_until"], g["t"] + 3.2)
+            g["score"] += 70 + level * 6
+            self.effect("slow", cx, cy)
+        g["combo"] = max(g["combo"], 2)  # small assist
+        g["max_combo"] = max(g["max_combo"], g["combo"])
+        g["combo_timer"] = max(g["combo_timer"], 1.2)
+        g["shake"] = max(g["shake"], 6.0)
+
+    def update(self, dt):
+        inp = input_mask(self.input_source())
+        self.profiler.lap("input")
+        self.step(inp, dt)
+        if self.recorder is not None:
+            self.recorder.record(inp)
+            self.profiler.lap("record")
+
+    def step(self, inp, dt):
+        # one tick of the rules for inp (an IN_* mask or a TickInput)
+        inp = input_mask(inp)
+        g = self.game
+        self.world_moved = self.bg_moved = False
+
+        if inp & IN_QUIT:
+            self.quit()
+
+        # ---------------- MENU ----------------
+        if self.state == "MENU":
+            space_down = bool(inp & IN_START)
+            if space_down and not self.space_was:
+                self.game = self.reset_game()
+                self.state = "PLAY"
+            self.space_was = space_down
+            self.menu_keys(inp)
+            return
+
+        # ---------------- PLAY ----------------
+        # Pause toggle
+        p_down = bool(inp & IN_PAUSE)
+        if p_down and not self.p_was and (not g["game_over"]):
+            g["paused"] = not g["paused"]
+        self.p_was = p_down
+
+        # Game over inputs
+        if g["game_over"]:
+            if inp & IN_RESTART:
+                self.game = self.reset_game()
+                g = self.game
+            if inp & IN_MENU:
+                self.state = "MENU"
+            # still update particles & background a bit
+            self.update_background(dt)
+            self.update_particles(dt * 0.9)
+            self.update_shake_flash(dt)
+            return
+
+        if g["paused"]:
+            self.update_background(dt * 0.25)
+            self.update_particles(dt * 0.18)
+            self.update_shake_flash(dt * 0.25)
+            return
+
+        # time; warp is the world's clock (slowed by SLOW), entity positions are
+        # closed-form functions of it
+        self.world_moved = True
+        level = self.advance_clock(dt)
+        now_t = g["t"]
+
+        self.tick_player(inp, dt)
+        prof = self.profiler
+        prof.lap("player")
+
+        self.tick_spawns(dt)
+        prof.lap("spawn")
+
+        self.move_entities()
+
+        self.decay_combo(dt)
+
+        arrays = g["arrays"]
+        grids = g["grids"]
+
+        # Coin collision
+        if arrays is not None:
+            for cx, cy in arrays.take_coins(g["player"]):
+                self.collect_coin(cx, cy, level)
+        else:
+            for c in grids["coins"].near(g["player"]):
+                if g["player"].colliderect(c.rect):
+                    self.collect_coin(c.rect.centerx, c.rect.centery, level)
+                    grids["coins"].remove(c)
+                    g["coins"].remove(c)
+                    self.pools["coins"].release(c)
+        prof.lap("collide_coins")
+
+        # Powerup collision
+        if arrays is not None:
+            for kind, cx, cy in arrays.take_powerups(g["player"]):
+                self.collect_powerup(kind, cx, cy, level)
+        else:
+            for pu in grids["powerups"].near(g["player"]):
+                if g["player"].colliderect(pu.rect):
+                    self.collect_powerup(pu.kind, pu.rect.centerx, pu.rect.centery, level)
+                    grids["powerups"].remove(pu)
+                    g["powerups"].remove(pu)
+                    self.pools["powerups"].release(pu)
+        prof.lap("collide_powerups")
+
+        # Obstacle collision (swept over the tick, invincibility)
+        invincible = now_t < g["invincible_until"]
+        if not invincible:
+            p = g["player"]
+            prev_px = int(g["player_prev_x"])
+            if arrays is not None:
+                if arrays.sweep_hits_obstacle(p, prev_px):
+                    self.apply_hit()
+            else:
+                # anything that crossed the player this tick is at most reach below it now
+                grid = grids["obstacles"]
+                reach = int(self.spawn_limits(level)[0] * dt) + 1
+                for o in grid.band(p.top - grid.max_h, p.bottom + reach):
+                    r = o.rect
+                    if sweep_overlaps(o.prev_x - prev_px, int(o.prev_y) - p.y, r.x - p.x, r.y - p.y, r.w, r.h, p.w, p.h):
+                        self.apply_hit()
+                        break
+        prof.lap("collide_obstacles")
+
+        # background/particles/shake
+        self.update_background(dt)
+        self.update_particles(dt)
+        self.update_shake_flash(dt)
+
+        # Best time update
+        self.update_best()
+        prof.lap("best")
+
+    def advance_clock(self, dt):
+        # game time and the warped world clock; returns the level
+        g = self.game
+        g["t"] += dt
+        g["warp"] += self.world_speed_mul() * dt
+        return 1 + int(g["t"] // 10)
+
+    def tick_player(self, inp, dt):
+        g = self.game
+        now_t = g["t"]
+
+        # Dash (edge)
+        shift_down = bool(inp & IN_DASH)
+        can_dash = (now_t >= g["dash_cd_until"]) and (now_t >= g["dash_until"])
+
+        if shift_down and not self.shift_was and can_dash:
+            g["dash_until"] = now_t + g["dash_duration"]
+            g["dash_cd_until"] = now_t + g["dash_cooldown"]
+            g["shake"] = max(g["shake"], 6.0)
+            self.effect("dash", g["player"].centerx, g["player"].centery)
+
+        self.shift_was = shift_down
+
+        # Movement (smooth accel)
+        move_dir = 0
+        if inp & IN_LEFT:
+            move_dir -= 1
+        if inp & IN_RIGHT:
+            move_dir += 1
+
+        in_dash = now_t < g["dash_until"]
+        max_speed = g["dash_speed"] if in_dash else g["player_speed"]
+
+        if move_dir != 0:
+            g["vel_x"] += move_dir * g["accel"] * dt
+        else:
+            # friction to stop
+            if g["vel_x"] > 0:
+                g["vel_x"] = max(0.0, g["vel_x"] - g["friction"] * dt)
+            elif g["vel_x"] < 0:
+                g["vel_x"] = min(0.0, g["vel_x"] + g["friction"] * dt)
+
+        g["vel_x"] = clamp(g["vel_x"], -max_speed, max_speed)
+        g["player_prev_x"] = g["player_x"]
+        g["player_x"] = clamp(g["player_x"] + g["vel_x"] * dt, 0, WIDTH - g["player"].width)
+        g["player"].x = int(g["player_x"])
+
+    def spawn_limits(self, level):
+        # (fastest fall speed, tallest entity) anything spawned at this level can have
+        if self.level_limits is not None:
+            return self.level_limits
+        return max_fall_speed(level), MAX_ENTITY_H
+
+    def make_timeline(self, dt):
+        # this run's spawns: the level file's, or rolled from a seed drawn off self.rng
+        if self.timeline is not None:
+            self.timeline.close()
+        if self.level is not None:
+            source = read_level(self.level)
+        else:
+            source = procedural_spawns(random.Random(self.rng.getrandbits(64)), dt, self.game["t"])
+        self.timeline = SpawnTimeline(source, background=self.spawn_thread)
+        return self.timeline
+
+    def tick_spawns(self, dt):
+        # add every timeline record that is due (pre-rolled: no random draws here)
+        g = self.game
+        now_t = g["t"]
+        if now_t < g["spawn_at"]:
+            return
+        timeline = g["timeline"]
+        if timeline is None:
+            timeline = g["timeline"] = self.make_timeline(dt)
+        arrays = g["arrays"]
+        warp = g["warp"]
+        rec = timeline.get(g["spawn_next"])
+        while rec is not None and rec[0] <= now_t:
+            _, key, args = rec
+            pool = self.pools[key]
+            e = pool.acquire().reuse(*args)
+            e.warp0 = warp
+            if arrays is not None:
+                arrays.add(key, e)
+                pool.release(e)
+            else:
+                g[key].append(e)
+                g["grids"][key].insert(e)
+            g["spawn_next"] += 1
+            rec = timeline.get(g["spawn_next"])
+        g["spawn_at"] = rec[0] if rec is not None else math.inf
+
+    def move_entities(self):
+        # every entity to its closed-form position at the current warp / t, then cull
+        g = self.game
+        warp, now_t = g["warp"], g["t"]
+        arrays = g["arrays"]
+        grids = g["grids"]
+        prof = self.profiler
+        if arrays is not None:
+            # Move objects + remove off-screen, all at once
+            arrays.move(warp, now_t)
+            prof.lap("move")
+            arrays.cull()
+        else:
+            # Move objects (and keep the broad phase in step)
+            grid = grids["obstacles"]
+            for o in g["obstacles"]:
+                o.update(warp, now_t)
+                grid.update(o)
+            grid = grids["coins"]
+            for c in g["coins"]:
+                c.update(warp)
+                grid.update(c)
+            grid = grids["powerups"]
+            for pu in g["powerups"]:
+                pu.update(warp)
+                grid.update(pu)
+            prof.lap("move")
+
+            # Remove off-screen (in place, back to the pools)
+            pools = self.pools
+            pools["obstacles"].cull(g["obstacles"], HEIGHT + 170)
+            pools["coins"].cull(g["coins"], HEIGHT + 140)
+            pools["powerups"].cull(g["powerups"], HEIGHT + 160)
+            grids["obstacles"].cull(HEIGHT + 170)
+            grids["coins"].cull(HEIGHT + 140)
+            grids["powerups"].cull(HEIGHT + 160)
+        prof.lap("cull")
+
+    def decay_combo(self, dt):
+        g = self.game
+        if g["combo"] > 0:
+            g["combo_timer"] -= dt
+            if g["combo_timer"] <= 0:
+                g["combo"] = max(0, g["combo"] - 1)
+                g["combo_timer"] = g["combo_keep"] * 0.6 if g["combo"] > 0 else 0.0
+
+    def safe_ticks(self, dt, max_ticks):
+        # ticks before anything alive, or spawned meanwhile, can reach the player's rows
+        # (fall speeds only shrink under SLOW; 1 px margin for truncating negative y)
+        g = self.game
+        p = g["player"]
+        top = p.y - 1
+        level = 1 + int((g["t"] + max_ticks * dt) // 10)
+        n = min(max_ticks, math.floor(top / (self.spawn_limits(level)[0] * dt)))  # a fresh spawn
+        arrays = g["arrays"]
+        if arrays is not None:
+            for cols in (arrays.obstacles, arrays.coins, arrays.powerups):
+                if cols.n:
+                    y = cols["y"]
+                    above = y < p.bottom
+                    if above.any():
+                        gap = (top - (y + cols["h"]))[above] / (cols["speed"][above] * dt)
+                        n = min(n, math.floor(gap.min()))
+        else:
+            for key in ("obstacles", "coins", "powerups"):
+                for e in g[key]:
+                    if e.rect.y < p.bottom:
+                        n = min(n, math.floor((top - (e.y + e.rect.h)) / (e.speed * dt)))
+        return max(0, n)
+
+    def skip_ahead(self, dt, max_ticks):
+        # fast-forward up to max_ticks ticks while nothing can reach the player: only the
+        # clocks, player, spawns and timers tick, entities are placed once at the end and
+        # no collision can have been missed, so the state matches ticking one by one.
+        # Only for input sources that ignore the entities, and not while recording (the
+        # recorder checksums every tick). Returns the ticks consumed (0: call update()).
+        g = self.game
+        if self.state != "PLAY" or g["paused"] or g["game_over"] or self.recorder is not None:
+            return 0
+        n = self.safe_ticks(dt, max_ticks)
+        if n < 2:
+            return 0
+        self.world_moved = True
+        skipped = 0
+        inp = input_mask(self.input_source())
+        while not inp & ~MOVE_BITS:  # a pause / restart / menu / quit mask ends the window
+            skipped += 1
+            # read one input ahead, so the last skipped tick is known before it runs
+            nxt = input_mask(self.input_source()) if skipped < n else None
+            if nxt is None or nxt & ~MOVE_BITS:
+                # place everything as of the tick before the last, so the previous positions
+                # (interpolation, sweeps, the vectorized store's checksum) match tick-by-tick
+                self.move_entities()
+            self.p_was = False  # no pause bit in this input
+            self.advance_clock(dt)
+            self.tick_player(inp, dt)
+            self.tick_spawns(dt)
+            self.decay_combo(dt)
+            self.update_shake_flash(dt)
+            self.update_best()
+            if nxt is None:
+                break
+            inp = nxt
+        if skipped:
+            self.move_entities()
+            self.update_background(skipped * dt)
+            self.update_particles(skipped * dt)
+        if inp & ~MOVE_BITS:
+            self.step(inp, dt)
+            return skipped + 1
+        return skipped
+
+    def update_shake_flash(self, dt):
+        g = self.game
+        g["shake"] = max(0.0, g["shake"] - 26.0 * dt)
+        g["flash"] = max(0.0, g["flash"] - 2.8 * dt)
+        self.profiler.lap("fx")
+
+    # front-end hooks: the rules call them, nothing they do feeds back into the state
+    def effect(self, kind, x, y):
+        # a burst at (x, y): "dash", "coin", "shield", "slow", "hit" or "shield_hit"
+        pass
+
+    def update_background(self, dt):
+        # dt: time the background moves this tick (less while paused)
+        pass
+
+    def update_particles(self, dt):
+        pass
+
+    def end_run(self):
+        # the run just ended (game over), after the final state is set
+        pass
+
+    def menu_keys(self, inp):
+        # the menu's input mask, every menu tick
+        pass
+
+
+# -------------------------
+# Autopilot (lookahead search, --autopilot)
+# -------------------------
+# idle, left, right, dash left, dash right
+AUTOPILOT_ACTIONS = (0, IN_LEFT, IN_RIGHT, IN_LEFT | IN_DASH, IN_RIGHT | IN_DASH)
+
+
+@dataclass(eq=False)
+class PlanNode:
+    snap: GameSnapshot  # state after holding action for Autopilot.STEP_TICKS ticks
+    action: int
+    depth: int  # steps since the node the tree was (re)built from
+    value: float = 0.0  # reward into this node + the best child's value (leaf: estimate)
+    reward: float = 0.0
+    dead: bool = False
+    visits: int = 0
+    crc: int = None  # checksum, filled in when the node becomes the root
+    children: list = field(default_factory=list)
+
+
+class Autopilot:
+    # input_source that plays by searching ahead. Nodes are snapshots STEP_TICKS apart,
+    # expanded with the real rules on a private Sim until the per-tick
+    # budget runs out; the chosen child becomes the next root, so the subtree grown
+    # under it while its action plays out is kept.
+    STEP_TICKS = 6
+    MAX_DEPTH = 10
+    EXPLORE = 30.0
+    HIT_COST = 400.0
+    DEATH_COST = 5000.0
+    SCORE_GAIN = 0.5
+    DANGER_COST = 150.0  # leaf estimate: obstacles above the player's column
+    DANGER_RANGE = 320.0
+    COST_MARGIN = 2.0
+    RESTART_TICKS = 60  # linger on the game over screen before restarting
+
+    def __init__(self, game, budget_ms=2.0, dt=1.0 / FPS, passthrough=None):
+        # passthrough: another input_source whose non-movement bits (pause, menu, quit)
+        # are kept, so the keyboard still works while the autopilot plays
+        self.game = game
+        self.budget = budget_ms / 1e3
+        self.dt = dt
+        self.passthrough = passthrough
+        self.sim = Sim(vectorized=game.vectorized, level=game.level)  # same spawn limits
+        self.root = None
+        self.held = 0  # action of the step being played
+        self.left = 0  # its ticks still to play
+        self.expand_cost = 0.0  # running mean of one expansion, seconds
+        self.step_cost = 0.0  # running mean of the step-boundary work around the search, seconds
+        self.over_ticks = 0
+        self.tick_times = deque(maxlen=36000)  # seconds spent per tick
+        self.expansions = 0
+        self.runs = []  # survival time of every finished run
+
+    def __call__(self):
+        extra = self.passthrough() & ~MOVE_BITS if self.passthrough else 0
+        game = self.game
+        if game.state == "MENU":
+            return extra | IN_START
+        g = game.game
+        if g["game_over"]:
+            if self.over_ticks == 0:
+                self.runs.append(g["t"])
+            self.root = None
+            self.left = 0
+            self.over_ticks += 1
+            return extra | (IN_RESTART if self.over_ticks > self.RESTART_TICKS else 0)
+        self.over_ticks = 0
+        if g["paused"]:
+            return extra
+
+        start = time.perf_counter()
+        deadline = start + self.budget
+        first = self.left == 0
+        if first:
+            self.choose(deadline)
+        else:
+            self.search(deadline)
+        self.left -= 1
+        self.tick_times.append(time.perf_counter() - start)
+        # dash is edge-triggered: pressed on the step's first tick only, as expand() plays it
+        return extra | (self.held if first else self.held & ~IN_DASH)
+
+    def choose(self, deadline):
+        # a step boundary: the root must be the real state, else the tree is rebuilt.
+        # The work around the search (checksums, the rebuilt root's snapshot, restoring
+        # the chosen child, freeing the discarded subtrees) is timed too, and its running
+        # mean kept off the search
+        perf = time.perf_counter
+        t0 = perf()
+        crc = self.game.checksum()
+        if self.root is None or self.root.crc != crc:
+            self.root = PlanNode(self.game.snapshot(), 0, 0, crc=crc)
+        spent = perf() - t0
+        self.search(deadline - self.COST_MARGIN * self.step_cost)
+        t0 = perf()
+        root = self.root
+        self.root = None
+        self.held = 0
+        if root.children:
+            best = max(root.children, key=lambda n: n.value)
+            self.held = best.action
+            if not best.dead:
+                self.sim.restore(best.snap)
+                best.crc = self.sim.checksum()
+                self.root = best
+        root = None  # the old root and the siblings' subtrees are freed here, on the clock
+        spent += perf() - t0
+        self.step_cost += (min(spent, self.budget) - self.step_cost) * 0.1
+        self.left = self.STEP_TICKS
+
+    def search(self, deadline):
+        root = self.root
+        if root is None:
+            return  # nothing planned for the step being played (out of budget at its start)
+        perf = time.perf_counter
+        limit = root.depth + self.MAX_DEPTH
+        if perf() + self.COST_MARGIN * self.expand_cost >= deadline:
+            # nothing fits: shrink the estimate so a run of slow expansions cannot stall the search
+            self.expand_cost *= 0.8
+            return
+        # start another expansion only if a slower-than-usual one still fits
+        while perf() + self.COST_MARGIN * self.expand_cost < deadline:
+            path = [root]
+            node = root
+            while len(node.children) == len(AUTOPILOT_ACTIONS):
+                node = self.pick(node, limit)
+                if node is None:
+                    break
+                path.append(node)
+            if node is None:
+                if len(path) == 1:
+                    return  # every branch is dead or at the depth limit
+            elif node.depth < limit and not node.dead:
+                t0 = perf()
+                node.children.append(self.expand(node, AUTOPILOT_ACTIONS[len(node.children)]))
+                cost = min(perf() - t0, self.budget)  # a GC pause is not a typical expansion
+                self.expand_cost += (cost - self.expand_cost) * 0.1
+                self.expansions += 1
+            self.backup(path)
+
+    def pick(self, node, limit):
+        # UCB over children that can still grow
+        log_n = math.log(node.visits + 1)
+        best, best_score = None, -math.inf
+        for child in node.children:
+            if child.dead or (child.depth >= limit):
+                continue
+            score = child.value + self.EXPLORE * math.sqrt(log_n / (child.visits + 1))
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def backup(self, path):
+        for node in reversed(path):
+            node.visits += 1
+            if node.children:
+                node.value = node.reward + max(c.value for c in node.children)
+
+    def expand(self, parent, action):
+        sim = self.sim
+        sim.restore(parent.snap)
+        g = sim.game
+        hits, score = g["hits"], g["score"]
+        for i in range(self.STEP_TICKS):
+            # dash is edge-triggered: press it on the first tick only
+            sim.step(action if i == 0 else action & ~IN_DASH, self.dt)
+            if g["game_over"]:
+                break
+        reward = self.SCORE_GAIN * (g["score"] - score) - self.HIT_COST * (g["hits"] - hits)
+        if g["game_over"]:
+            reward -= self.DEATH_COST
+            return PlanNode(None, action, parent.depth + 1, reward, reward, dead=True)
+        node = PlanNode(sim.snapshot(), action, parent.depth + 1, reward=reward)
+        node.value = reward - self.danger()
+        return node
+
+    def danger(self):
+        # leaf estimate beyond the horizon: obstacles falling toward the player's column
+        # (nearer ones weigh more), averaged with the best column it could slide to, so
+        # a leaf with a way out scores better than a boxed-in one
+        p = self.sim.game["player"]
+        threats = []
+        for x, y, w, h in self.sim.boxes("obstacles"):
+            gap = p.y - (y + h)
+            if -h < gap < self.DANGER_RANGE:
+                threats.append((x - 10 - p.w, x + w + 10, self.DANGER_COST / (1.0 + max(0.0, gap) / 40.0)))
+        if not threats:
+            return 0.0
+
+        def column(cx):
+            return sum(c for lo, hi, c in threats if lo < cx < hi)
+
+        escape = min(column(cx) + abs(cx - p.x) * 0.1 for cx in range(0, WIDTH - p.w + 1, 25))
+        return 0.5 * (column(p.x) + escape)
+
+    def report(self):
+        ms = sorted(t * 1e3 for t in self.tick_times)
+        if not ms:
+            return "autopilot: no search ticks"
+        pct = lambda q: ms[int(q * (len(ms) - 1))]  # noqa: E731
+        runs = "no finished runs"
+        if self.runs:
+            runs = f"{len(self.runs)} finished runs, mean survival {sum(self.runs) / len(self.runs):.1f}s"
+        return (
+            f"autopilot: {self.budget * 1e3:g} ms budget, per tick p50 {pct(0.5):.2f} p99 {pct(0.99):.2f} "
+            f"max {ms[-1]:.2f} ms; {self.expansions} expansions; {runs}"
+        )
+
+
+def run_headless(game, seconds, dt=1.0 / FPS, skip=False):
+    # no render, no clock pacing: update() back to back as fast as the CPU allows
+    # skip: fast-forward with Sim.skip_ahead() whenever nothing is near the player
+    ticks = int(round(seconds / dt))
+    prof = game.profiler
+    done = skipped = 0
+    start = time.perf_counter()
+    while done < ticks:
+        prof.start()
+        n = game.skip_ahead(dt, ticks - done) if skip else 0
+        if n:
+            skipped += n
+        else:
+            game.update(dt)
+            n = 1
+        prof.end(game.counts())
+        done += n
+    wall = time.perf_counter() - start
+    sim = ticks * dt
+    return {
+        "ticks": ticks,
+        "skipped_ticks": skipped,
+        "sim_seconds": sim,
+        "wall_seconds": wall,
+        "sim_per_wall": sim / wall if wall > 0 else float("inf"),
+    }
+
+
+# -------------------------
+# Command line (headless simulation / replays)
+# -------------------------
+# python dodge_core.py needs neither pygame nor SDL; dodge_game_v2.py shares these
+# options (its --headless / --replay run the same code) and adds the window's own
+def add_sim_args(parser):
+    parser.add_argument("--seconds", type=float, default=300.0, help="simulated seconds when headless")
+    parser.add_argument("--vectorized", action="store_true", help="NumPy structure-of-arrays entity store")
+    parser.add_argument("--tick-rate", type=float, default=FPS, help="simulation ticks per second")
+    parser.add_argument("--seed", type=parse_seed, help="seed for a reproducible run")
+    parser.add_argument("--record", metavar="PATH", help="record per-tick input + checksums to PATH")
+    parser.add_argument("--replay", metavar="PATH", nargs="+", help="re-simulate and verify recordings (headless)")
+    parser.add_argument("--profile", metavar="PATH", help="write per-frame phase timings (JSON lines)")
+    parser.add_argument(
+        "--autopilot", type=float, nargs="?", const=2.0, metavar="MS", help="lookahead bot plays, MS search per tick"
+    )
+    parser.add_argument("--skip-ahead", action="store_true", help="headless: fast-forward while nothing is near the player")
+    parser.add_argument("--level", metavar="PATH", help="spawn from a level file instead of procedurally")
+
+
+def check_sim_args(parser, args):
+    if args.level:
+        if args.record:
+            # a recording stores the seed, not the level
+            parser.error("--level cannot be combined with --record")
+        try:
+            for _ in read_level(args.level):
+                pass
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    if args.skip_ahead and (args.autopilot is not None or args.record):
+        # the autopilot reads entity positions every tick, the recorder checksums every tick
+        parser.error("--skip-ahead cannot be combined with --autopilot or --record")
+
+
+def verify_replays(paths):
+    # replay_file() each recording and report; returns the exit status
+    failed = 0
+    start = time.perf_counter()
+    for path in paths:
+        res = replay_file(path)
+        if not res["ok"]:
+            failed += 1
+            print(f"DIVERGED {path}: checksum mismatch within the {CHECKPOINT_TICKS} ticks before {res['ticks']}")
+    wall = time.perf_counter() - start
+    print(f"{len(paths) - failed}/{len(paths)} replays ok in {wall:.2f}s")
+    return 1 if failed else 0
+
+
+def simulate(args):
+    # the rules alone: no display, particles or starfield
+    game = Sim(
+        input_source=ScriptedInput(demo_script(), loop=True),
+        vectorized=args.vectorized,
+        seed=args.seed,
+        level=args.level,
+        profiler=FrameProfiler(args.profile),
+    )
+    if args.autopilot is not None:
+        game.input_source = Autopilot(game, args.autopilot, 1.0 / args.tick_rate)
+    if args.record:
+        game.recorder = InputRecorder(args.record, game, 1.0 / args.tick_rate)
+    stats = run_headless(game, args.seconds, dt=1.0 / args.tick_rate, skip=args.skip_ahead)
+    game.close()
+    print(
+        f"simulated {stats['sim_seconds']:.1f}s ({stats['ticks']} ticks) "
+        f"in {stats['wall_seconds']:.2f}s wall = {stats['sim_per_wall']:.1f} sim-s/s"
+    )
+    if args.skip_ahead:
+        print(f"{stats['skipped_ticks']} ticks fast-forwarded")
+    if args.autopilot is not None:
+        print(game.input_source.report())
+    return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dodge Game v2 rules, headless (no pygame)")
+    add_sim_args(parser)
+    args = parser.parse_args(argv)
+    check_sim_args(parser, args)
+    if args.replay:
+        sys.exit(verify_replays(args.replay))
+    simulate(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import argparse
+import hashlib
+import inspect
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+# workers only simulate: the rules core, without pygame / SDL (or NumPy unless --vectorized)
+import dodge_core as core
+
+CACHE_PATH = Path("farm_cache.jsonl")
+METRICS = ("survival", "score", "max_combo", "hits", "level")
+
+
+# -------------------------
+# Bot policies
+# -------------------------
+# a policy is called once per tick with the Sim and returns an IN_* mask
+
+
+class RandomBot:
+    # holds a random direction for a short while, dashes now and then
+    def __init__(self, seed):
+        self.rng = random.Random(f"{seed}/bot")
+        self.mask = 0
+        self.hold = 0
+
+    def __call__(self, game):
+        if self.hold <= 0:
+            self.mask = self.rng.choice((0, core.IN_LEFT, core.IN_RIGHT))
+            if self.rng.random() < 0.08:
+                self.mask |= core.IN_DASH
+            self.hold = self.rng.randint(6, 30)
+        self.hold -= 1
+        return self.mask
+
+
+class SteerBot:
+    # scores candidate x positions against obstacles about to reach the player's row
+    # and steers to the best one; coin_weight > 0 also pulls it toward coins
+    LOOKAHEAD = 260  # px above the player that count as threats
+    STEP = 25  # candidate spacing
+    MARGIN = 14
+
+    def __init__(self, seed, coin_weight=0.0):
+        self.coin_weight = coin_weight
+
+    def __call__(self, game):
+        g = game.game
+        p = g["player"]
+        top = p.y - self.LOOKAHEAD
+        threats = [(x, y, w, h) for x, y, w, h in game.boxes("obstacles") if y + h > top and y < p.bottom]
+        coins = [(x + w / 2, y) for x, y, w, h in game.boxes("coins") if top < y < p.bottom] if self.coin_weight else []
+
+        best_x, best_cost = p.x, math.inf
+        for cx in range(0, core.WIDTH - p.w + 1, self.STEP):
+            cost = abs(cx - p.x) * 0.02
+            for x, y, w, h in threats:
+                if x - self.MARGIN < cx + p.w and cx < x + w + self.MARGIN:
+                    # nearer threats weigh more
+                    cost += 1000.0 / (1.0 + max(0.0, p.y - (y + h)))
+            for x, y in coins:
+                dist = abs(cx + p.w / 2 - x)
+                cost -= self.coin_weight * max(0.0, 1.0 - dist / 120.0) * (1.0 + (y - top) / self.LOOKAHEAD)
+            if cost < best_cost:
+                best_x, best_cost = cx, cost
+
+        mask = 0
+        if best_x < p.x - 6:
+            mask = core.IN_LEFT
+        elif best_x > p.x + 6:
+            mask = core.IN_RIGHT
+        # dash when the current spot is about to be hit and the escape is far
+        if mask and abs(best_x - p.x) > 90 and self.under_threat(p, threats):
+            mask |= core.IN_DASH
+        return mask
+
+    def under_threat(self, p, threats):
+        return any(x < p.right and p.x < x + w and p.y - (y + h) < 70 for x, y, w, h in threats)
+
+
+class CoinBot(SteerBot):
+    def __init__(self, seed):
+        super().__init__(seed, coin_weight=1.5)
+
+
+POLICIES = {
+    "random": RandomBot,
+    "dodge": SteerBot,
+    "coins": CoinBot,
+}
+
+
+class BotInput:
+    # input_source for Sim: starts a run from the menu, then defers to the policy
+    def __init__(self, policy, game):
+        self.policy = policy
+        self.game = game
+
+    def __call__(self):
+        if self.game.state == "MENU":
+            return core.IN_START
+        return self.policy(self.game)
+
+
+# -------------------------
+# Runs
+# -------------------------
+def rules_version(tick_rate, max_seconds, vectorized):
+    # RULES_VERSION plus a digest of the rule code and of the bots, so an edited
+    # tuning constant or policy invalidates old results without a manual bump
+    parts = [
+        core.roll_obstacle, core.roll_coin, core.roll_powerup, core.procedural_spawns,
+        core.Rect, core.Obstacle, core.Coin, core.PowerUp, core.EntityArrays, core.EntityPool, core.RowGrid,
+        core.max_fall_speed,
+        core.Sim.reset_game, core.Sim.step, core.Sim.advance_clock, core.Sim.tick_player,
+        core.Sim.make_timeline, core.Sim.tick_spawns, core.Sim.move_entities, core.Sim.decay_combo, core.Sim.apply_hit,
+        core.Sim.collect_coin, core.Sim.collect_powerup, core.Sim.world_speed_mul, core.Sim.spawn_limits,
+        core.sweep_overlaps, core.sweep_span,
+        RandomBot, SteerBot, CoinBot,
+    ]  # fmt: skip
+    consts = (core.WIDTH, core.HEIGHT, core.ROW_H, core.ROW_TOP, core.MAX_ENTITY_H)  # module-level, not in any source
+    code = "".join(inspect.getsource(p) for p in parts) + repr(consts)
+    digest = hashlib.sha1(code.encode()).hexdigest()[:10]
+    store = "vec" if vectorized else "list"
+    return f"{core.RULES_VERSION}-{digest}-{tick_rate:g}hz-{max_seconds:g}s-{store}"
+
+
+def run_one(job):
+    policy_name, seed, rules, tick_rate, max_seconds, vectorized = job
+    game = core.Sim(vectorized=vectorized, seed=seed)
+    game.input_source = BotInput(POLICIES[policy_name](seed), game)
+    dt = 1.0 / tick_rate
+    max_ticks = int(max_seconds * tick_rate) + 1  # + the tick that leaves the menu
+    for _ in range(max_ticks):
+        game.update(dt)
+        if game.game["game_over"]:
+            break
+    g = game.game
+    return {
+        "policy": policy_name,
+        "seed": seed,
+        "rules": rules,
+        "survival": round(g["t"], 4),
+        "score": g["score"],
+        "max_combo": g["max_combo"],
+        "hits": g["hits"],
+        "level": 1 + int(g["t"] // 10),
+        "capped": not g["game_over"],
+    }
+
+
+def load_cache(path):
+    done = {}
+    if path.exists():
+        with path.open() as fh:
+            for line in fh:
+                try:
+                    res = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interrupted sweep
+                done[res["policy"], res["seed"], res["rules"]] = res
+    return done
+
+
+def sweep(policies, seeds, workers, tick_rate=core.FPS, max_seconds=300.0, vectorized=False, cache=CACHE_PATH):
+    # yields one result per (policy, seed); memoized ones first, the rest as workers finish
+    rules = rules_version(tick_rate, max_seconds, vectorized)
+    done = load_cache(cache) if cache else {}
+    todo = []
+    for policy in policies:
+        for seed in seeds:
+            res = done.get((policy, seed, rules))
+            if res is not None:
+                yield res
+            else:
+                todo.append((policy, seed, rules, tick_rate, max_seconds, vectorized))
+    if not todo:
+        return
+
+    out = cache.open("a") if cache else None
+    try:
+        with Pool(workers) as pool:
+            for res in pool.imap_unordered(run_one, todo, chunksize=max(1, len(todo) // (workers * 16))):
+                if out:
+                    out.write(json.dumps(res) + "\n")
+                    out.flush()
+                yield res
+    finally:
+        if out:
+            out.close()
+
+
+# -------------------------
+# Aggregation
+# -------------------------
+class Aggregate:
+    def __init__(self):
+        self.values = {}  # policy -> metric -> list
+        self.capped = {}
+
+    def add(self, res):
+        per = self.values.setdefault(res["policy"], {m: [] for m in METRICS})
+        for m in METRICS:
+            per[m].append(res[m])
+        self.capped[res["policy"]] = self.capped.get(res["policy"], 0) + res["capped"]
+
+    def summary(self, policy, metric):
+        vals = sorted(self.values[policy][metric])
+        n = len(vals)
+        mean = statistics.fmean(vals)
+        sd = statistics.stdev(vals) if n > 1 else 0.0
+        return {
+            "n": n,
+            "mean": mean,
+            "ci95": 1.96 * sd / math.sqrt(n),  # half-width, normal approximation
+            "p10": vals[int(0.10 * (n - 1))],
+            "p50": vals[int(0.50 * (n - 1))],
+            "p90": vals[int(0.90 * (n - 1))],
+        }
+
+    def report(self):
+        lines = []
+        for policy in self.values:
+            n = len(self.values[policy]["survival"])
+            lines.append(f"{policy}  ({n} runs, {self.capped[policy]} hit the time cap)")
+            for m in METRICS:
+                s = self.summary(policy, m)
+                lines.append(
+                    f"  {m:<10}{s['mean']:>10.2f} ±{s['ci95']:<8.2f}"
+                    f"p10 {s['p10']:<9g}p50 {s['p50']:<9g}p90 {s['p90']:g}"
+                )
+        return "\n".join(lines)
+
+
+def parse_seeds(text):
+    # "500" -> 0..499, "1000:1500" -> 1000..1499
+    if ":" in text:
+        lo, hi = text.split(":")
+        return range(int(lo), int(hi))
+    return range(int(text))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dodge Game v2 bot farm")
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=sorted(POLICIES))
+    parser.add_argument("--seeds", type=parse_seeds, default=parse_seeds("200"), help="N or START:STOP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--tick-rate", type=float, default=core.FPS)
+    parser.add_argument("--max-seconds", type=float, default=300.0, help="cap per run (simulated)")
+    parser.add_argument("--vectorized", action="store_true", help="NumPy entity store in the workers")
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH, help="memo file (JSON lines)")
+    parser.add_argument("--no-cache", action="store_true", help="recompute everything, store nothing")
+    args = parser.parse_args(argv)
+
+    agg = Aggregate()
+    total = len(args.policies) * len(args.seeds)
+    start = time.perf_counter()
+    results = sweep(
+        args.policies,
+        args.seeds,
+        args.workers,
+        tick_rate=args.tick_rate,
+        max_seconds=args.max_seconds,
+        vectorized=args.vectorized,
+        cache=None if args.no_cache else args.cache,
+    )
+    for i, res in enumerate(results, 1):
+        agg.add(res)
+        if i % 100 == 0 or i == total:
+            print(f"\r{i}/{total} runs", end="", file=sys.stderr, flush=True)
+    print(f"\n{total} runs in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    print(agg.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,104 @@
+import time
+
+# cold-start clock: pygame and NumPy below are most of the time to the first frame
+STARTUP_T0 = time.perf_counter()  # startup marks (STARTUP) are ms since here
+
+import argparse
+import os
 import pygame
+import queue
 import random
+import sqlite3
 import sys
 import math
-from dataclasses import dataclass
+import threading
+import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
-pygame.init()
+from dodge_core import (
+    FPS,
+    HEIGHT,
+    IN_DASH,
+    IN_LEFT,
+    IN_MENU,
+    IN_PAUSE,
+    IN_QUIT,
+    IN_RESTART,
+    IN_RIGHT,
+    IN_START,
+    POWERUP_KINDS,
+    SEED_LIMIT,
+    WIDTH,
+    Autopilot,
+    FrameProfiler,
+    InputRecorder,
+    Sim,
+    add_sim_args,
+    check_sim_args,
+    clamp,
+    lerp,
+    simulate,
+    verify_replays,
+)
+
+STARTUP = {"imports": round((time.perf_counter() - STARTUP_T0) * 1e3, 1)}
+
+# windowless tools (benchmarks) still render: SDL's dummy driver must be picked before init
+if os.environ.get("DODGE_HEADLESS") == "1":
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
 
 # -------------------------
 # Screen / Basic
 # -------------------------
-WIDTH, HEIGHT = 900, 650
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Dodge Game v2")
+# nothing starts at import: the first Game opens the display, fonts load on first use
+screen = None  # the display surface, once init_display() ran
+screen_hidden = False  # opened for offscreen games only: no visible window
+display_users = 0  # live Games holding the display (init_display / close_display pairs)
+
+
+def mark_startup(name):
+    STARTUP[name] = round((time.perf_counter() - STARTUP_T0) * 1e3, 1)
+
+
+def startup_report():
+    marks = ", ".join(f"{name.replace('_', ' ')} {ms:.1f}" for name, ms in STARTUP.items())
+    return f"startup (ms since start): {marks}"
+
+
+def init_display(hidden=False):
+    # only the video subsystem (no audio / joystick / ...), once; hidden: offscreen games
+    # need a display mode for convert() but no window (a later windowed Game shows it).
+    # Each call holds the display until its close_display()
+    global screen, screen_hidden, display_users
+    display_users += 1
+    if screen is None or (screen_hidden and not hidden):
+        pygame.display.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.HIDDEN if hidden else pygame.SHOWN)
+        pygame.display.set_caption("Dodge Game v2")
+        screen_hidden = hidden
+        if "display" not in STARTUP:
+            mark_startup("display")
+    return screen
+
+
+def close_display():
+    # the last holder quits pygame, which invalidates the display, the fonts and surfaces
+    # converted for the display: forget them all, so a later Game in this process starts over
+    global screen, screen_hidden, display_users
+    display_users -= 1
+    if display_users > 0:
+        return  # other Games (e.g. several offscreen envs) still render
+    pygame.quit()
+    screen = None
+    screen_hidden = False
+    pick_font.cache_clear()
+    render_text.cache_clear()
+    sprites.clear()
 
-clock = pygame.time.Clock()
-FPS = 60
 
 BLACK = (0, 0, 0)
 WHITE = (245, 245, 245)
@@ -29,46 +112,209 @@ BLUE = (90, 170, 255)
 PURPLE = (190, 120, 255)
 CYAN = (120, 235, 255)
 
-font = pygame.font.SysFont(None, 34)
-big_font = pygame.font.SysFont(None, 84)
-mid_font = pygame.font.SysFont(None, 44)
+FONT_SIZES = {"": 34, "big": 84, "mid": 44, "small": 20}  # small: profiler overlay
 
 SAVE_PATH = Path("best_time.txt")
+RUNS_PATH = Path("runs.db")  # run history (SQLite)
 
 
-def clamp(v, lo, hi):
-    return max(lo, min(hi, v))
-
-
-def lerp(a, b, t):
-    return a + (b - a) * t
+@lru_cache(maxsize=None)
+def pick_font(size=""):
+    # pygame's bundled default font: what SysFont(None, ...) resolves to, minus its
+    # scan of the system font list
+    if not pygame.font.get_init():
+        pygame.font.init()
+        mark_startup("fonts")
+    return pygame.font.Font(None, FONT_SIZES.get(size, FONT_SIZES[""]))
 
 
-def draw_text_center(text, y, color=WHITE, use_big=False, use_mid=False):
-    f = big_font if use_big else (mid_font if use_mid else font)
-    surf = f.render(text, True, color)
-    screen.blit(surf, (WIDTH // 2 - surf.get_width() // 2, y))
+@lru_cache(maxsize=256)
+def render_text(f, text, color):
+    return f.render(text, True, color)
 
 
-def draw_bar(x, y, w, h, value01, fg_color, bg_color=(35, 35, 35)):
-    pygame.draw.rect(screen, bg_color, (x, y, w, h))
+def draw_bar(surf, x, y, w, h, value01, fg_color, bg_color=(35, 35, 35)):
+    pygame.draw.rect(surf, bg_color, (x, y, w, h))
     fill = int(w * clamp(value01, 0.0, 1.0))
-    pygame.draw.rect(screen, fg_color, (x, y, fill, h))
-    pygame.draw.rect(screen, (70, 70, 70), (x, y, w, h), 2)
+    pygame.draw.rect(surf, fg_color, (x, y, fill, h))
+    return pygame.draw.rect(surf, (70, 70, 70), (x, y, w, h), 2)
 
 
-def load_best():
+def load_best(path=SAVE_PATH):
     try:
-        return float(SAVE_PATH.read_text(encoding="utf-8").strip())
+        return float(Path(path).read_text(encoding="utf-8").strip())
     except Exception:
         return 0.0
 
 
-def save_best(best: float):
-    try:
-        SAVE_PATH.write_text(f"{best:.1f}", encoding="utf-8")
-    except Exception:
-        pass
+class BestTimeStore:
+    # the best time lives in memory; a background writer saves it at most every
+    # interval seconds, and at once on flush() (game over) and close() (quit).
+    # Writes go to a temp file that is then renamed over the old one, so a crash
+    # mid-write leaves the previous record instead of a truncated file.
+    def __init__(self, path=SAVE_PATH, interval=5.0):
+        self.path = Path(path)
+        self.interval = interval
+        self.best = load_best(self.path)
+        self.saved = self.best
+        self.lock = threading.Lock()  # one write at a time
+        self.wake = threading.Event()
+        self.closed = False
+        self.thread = None  # started by the first new record
+
+    def update(self, best):
+        # every tick of a record run: no I/O here
+        self.best = best
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def flush(self):
+        self.wake.set()
+
+    def close(self):
+        self.closed = True
+        if self.thread is not None:
+            self.wake.set()
+            self.thread.join(timeout=2.0)
+        self.write()
+
+    def run(self):
+        while not self.closed:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self.write()
+
+    def write(self):
+        with self.lock:
+            best = self.best
+            if best == self.saved:
+                return
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            try:
+                with open(tmp, "w", encoding="utf-8") as fh:
+                    fh.write(f"{best:.1f}")
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                os.replace(tmp, self.path)
+                self.saved = best
+            except OSError:
+                pass  # keep it in memory; the next flush retries
+
+
+# -------------------------
+# Text layers (HUD labels + static screens)
+# -------------------------
+class Label:
+    # keeps its last rendered surface, re-renders only when text/color change
+    def __init__(self, size=""):
+        self.size = size
+        self.text = None
+        self.color = None
+        self.surf = None
+        self.changed_w = 0  # after a re-render: max(old, new) width, for dirty rects
+
+    def render(self, text, color=WHITE):
+        if text != self.text or color != self.color:
+            old_w = self.surf.get_width() if self.surf is not None else 0
+            self.text, self.color = text, color
+            self.surf = pick_font(self.size).render(text, True, color)
+            self.changed_w = max(old_w, self.surf.get_width())
+        else:
+            self.changed_w = 0
+        return self.surf
+
+
+class ScreenLayers:
+    # each static screen (menu / pause / game over) composed once into one surface,
+    # rebuilt only when its key (e.g. the best time on the menu) changes
+    def __init__(self):
+        self.layers = {}  # name -> (key, surface, pos)
+
+    def blit(self, surf, name, key, lines):
+        cached = self.layers.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, *self.compose(lines))
+            self.layers[name] = cached
+        surf.blit(cached[1], cached[2])
+
+    def compose(self, lines):
+        # lines: (text, y, color, font size), each centered horizontally
+        parts = []
+        for text, y, color, size in lines:
+            s = render_text(pick_font(size), text, color)
+            parts.append((s, pygame.Rect(WIDTH // 2 - s.get_width() // 2, y, s.get_width(), s.get_height())))
+        bounds = parts[0][1].unionall([r for _, r in parts[1:]])
+        layer = pygame.Surface(bounds.size, pygame.SRCALPHA)
+        for s, r in parts:
+            layer.blit(s, (r.x - bounds.x, r.y - bounds.y))
+        return layer.convert_alpha(), bounds.topleft
+
+
+def menu_lines(best_time):
+    return [
+        ("DODGE GAME", 150, WHITE, "big"),
+        ("Press SPACE to Start", 290, GOLD_INNER, "mid"),
+        ("Move: LEFT/RIGHT or A/D   Dash: SHIFT   Pause: P", 360, WHITE, ""),
+        ("Coins = Score + Combo | PowerUps: Shield / Slow", 402, WHITE, ""),
+        ("Red blocks = Damage", 444, WHITE, ""),
+        (f"Best Time: {best_time:.1f}s", 510, GREEN, ""),
+    ]
+
+
+PAUSE_LINES = [
+    ("PAUSED", HEIGHT // 2 - 90, WHITE, "big"),
+    ("Press P to Resume", HEIGHT // 2 + 10, GOLD_INNER, ""),
+]
+GAME_OVER_LINES = [
+    ("GAME OVER", HEIGHT // 2 - 120, WHITE, "big"),
+    ("R: Restart   M: Menu   ESC: Quit", HEIGHT // 2 - 20, GOLD_INNER, ""),
+]
+TIP_TEXT = "SHIFT: Dash | P: Pause | R: Restart | M: Menu | ESC: Quit"
+HUD_LABELS = ("time", "level", "hp", "score", "combo", "shield", "best")
+
+# menu leaderboard: SHIFT cycles the board, LEFT / RIGHT page through it
+BOARDS = ("score", "time", "today")
+BOARD_TITLES = {"score": "Top Scores", "time": "Longest Runs", "today": "Today's Top Scores"}
+BOARD_ROWS = 4
+
+
+def board_lines(board, page, rows):
+    # rows: a RunHistory page, None while it loads
+    lines = [(f"{BOARD_TITLES[board]}  (page {page + 1})   SHIFT: board   LEFT/RIGHT: page", 546, GOLD_INNER, "small")]
+    if not rows:
+        lines.append(("loading..." if rows is None else "no runs yet", 570, WHITE, "small"))
+        return lines
+    for i, (t, score, max_combo, level, day) in enumerate(rows):
+        rank = page * BOARD_ROWS + i + 1
+        text = f"{rank}.  {t:.1f}s   score {score}   combo {max_combo}   Lv {level}   {day}"
+        lines.append((text, 570 + i * 18, WHITE, "small"))
+    return lines
+
+
+# -------------------------
+# Input (one IN_* bitmask per update, see dodge_core)
+# -------------------------
+def read_keyboard():
+    keys = pygame.key.get_pressed()
+    mask = 0
+    if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        mask |= IN_LEFT
+    if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        mask |= IN_RIGHT
+    if keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]:
+        mask |= IN_DASH
+    if keys[pygame.K_p]:
+        mask |= IN_PAUSE
+    if keys[pygame.K_r]:
+        mask |= IN_RESTART
+    if keys[pygame.K_m]:
+        mask |= IN_MENU
+    if keys[pygame.K_SPACE]:
+        mask |= IN_START
+    if keys[pygame.K_ESCAPE]:
+        mask |= IN_QUIT
+    return mask
 
 
 # -------------------------
@@ -98,571 +344,860 @@ def draw_coin(surface, rect: pygame.Rect):
 # -------------------------
 # Particles
 # -------------------------
-@dataclass
-class Particle:
-    x: float
-    y: float
-    vx: float
-    vy: float
-    life: float
-    age: float
-    radius: float
-    color: tuple
+MAX_PARTICLES = 2048
+GRAVITY = 420.0
+
+# column rows of ParticlePool.data
+P_X, P_Y, P_VX, P_VY, P_LIFE, P_AGE, P_RADIUS = range(7)
+
+
+class ParticlePool:
+    # preallocated particle columns, live particles packed in [0, n) oldest first.
+    # when a burst doesn't fit, the oldest particles are recycled (ring behaviour).
+    # integration, emission and compaction all write into the preallocated buffers.
+    def __init__(self, capacity=MAX_PARTICLES, rng=None):
+        self.capacity = capacity
+        self.data = np.zeros((7, capacity))
+        self.colors = np.zeros((capacity, 3), dtype=np.uint8)
+        # compaction targets, swapped with data/colors after each compaction
+        self.spare = np.zeros((7, capacity))
+        self.spare_colors = np.zeros((capacity, 3), dtype=np.uint8)
+        self.scratch = np.zeros((2, capacity))
+        self.alive_mask = np.zeros(capacity, dtype=bool)
+        self.n = 0
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def __len__(self):
+        return self.n
+
+    def clear(self):
+        self.n = 0
+
+    def emit(self, x, y, color, count, power):
+        count = min(count, self.capacity)
+        over = self.n + count - self.capacity
+        if over > 0:
+            self.drop_oldest(over)
+
+        i, j = self.n, self.n + count
+        d = self.data
+        ang, spd = self.scratch[0, :count], self.scratch[1, :count]
+        rng = self.rng
+
+        rng.random(out=ang)
+        ang *= math.tau
+        rng.random(out=spd)
+        spd *= power * 0.55
+        spd += power * 0.45
+
+        vx, vy = d[P_VX, i:j], d[P_VY, i:j]
+        np.cos(ang, out=vx)
+        vx *= spd
+        np.sin(ang, out=vy)
+        vy *= spd
+        rng.random(out=spd)  # upward kick, reuses the speed row
+        spd *= power * 0.2
+        vy -= spd
+
+        d[P_X, i:j] = x
+        d[P_Y, i:j] = y
+        d[P_AGE, i:j] = 0.0
+        life, radius = d[P_LIFE, i:j], d[P_RADIUS, i:j]
+        rng.random(out=life)
+        life *= 0.22
+        life += 0.20
+        rng.random(out=radius)
+        radius *= 3.6
+        radius += 2.2
+        self.colors[i:j] = color
+        self.n = j
+
+    def drop_oldest(self, k):
+        n = self.n
+        self.spare[:, : n - k] = self.data[:, k:n]
+        self.spare_colors[: n - k] = self.colors[k:n]
+        self.swap()
+        self.n = n - k
+
+    def swap(self):
+        self.data, self.spare = self.spare, self.data
+        self.colors, self.spare_colors = self.spare_colors, self.colors
 
     def update(self, dt):
-        self.age += dt
-        self.vy += 420 * dt
-        self.x += self.vx * dt
-        self.y += self.vy * dt
+        n = self.n
+        if n == 0:
+            return
+        d = self.data[:, :n]
+        step = self.scratch[0, :n]
+
+        d[P_AGE] += dt
+        d[P_VY] += GRAVITY * dt
+        np.multiply(d[P_VX], dt, out=step)
+        d[P_X] += step
+        np.multiply(d[P_VY], dt, out=step)
+        d[P_Y] += step
+
+        # compact survivors into the spare buffers (order kept), then swap
+        alive = np.less(d[P_AGE], d[P_LIFE], out=self.alive_mask[:n])
+        k = int(np.count_nonzero(alive))
+        if k < n:
+            np.compress(alive, d, axis=1, out=self.spare[:, :k])
+            np.compress(alive, self.colors[:n], axis=0, out=self.spare_colors[:k])
+            self.swap()
+            self.n = k
 
-    def alive(self):
-        return self.age < self.life
+    def draw(self, surf, ox=0, oy=0):
+        n = self.n
+        if n == 0:
+            return
+        d = self.data[:, :n]
+        fade = 1.0 - np.clip(d[P_AGE] / d[P_LIFE], 0.0, 1.0)
+        radii = np.maximum(1, (d[P_RADIUS] * fade).astype(np.int32))
+        xs = d[P_X].astype(np.int32) + ox
+        ys = d[P_Y].astype(np.int32) + oy
+        circle = pygame.draw.circle
+        for x, y, r, color in zip(xs.tolist(), ys.tolist(), radii.tolist(), self.colors[:n].tolist()):
+            circle(surf, color, (x, y), r)
 
-    def draw(self, surf):
-        t = clamp(self.age / self.life, 0.0, 1.0)
-        r = max(1, int(self.radius * (1.0 - t)))
-        pygame.draw.circle(surf, self.color, (int(self.x), int(self.y)), r)
+        # bounds of the whole cloud (for dirty rects)
+        r = int(radii.max())
+        x0, y0 = int(xs.min()) - r, int(ys.min()) - r
+        return pygame.Rect(x0, y0, int(xs.max()) + r - x0 + 1, int(ys.max()) + r - y0 + 1)
 
 
-def emit_particles(particles, x, y, color, count=12, power=200):
-    for _ in range(count):
-        ang = random.uniform(0, math.tau)
-        spd = random.uniform(power * 0.45, power)
-        vx = math.cos(ang) * spd
-        vy = math.sin(ang) * spd - random.uniform(0, power * 0.2)
-        life = random.uniform(0.20, 0.42)
-        radius = random.uniform(2.2, 5.8)
-        particles.append(Particle(x, y, vx, vy, life, 0.0, radius, color))
+def emit_particles(particles: ParticlePool, x, y, color, count=12, power=200):
+    particles.emit(x, y, color, count, power)
 
 
 # -------------------------
 # Starfield background (parallax)
 # -------------------------
-@dataclass
-class Star:
-    x: float
-    y: float
-    speed: float
-    size: int
-    color: tuple
+STAR_TILE_H = HEIGHT * 2  # taller than the screen so the pattern repeats less often
 
-    def update(self, dt, world_speed_mul):
-        self.y += self.speed * world_speed_mul * dt
-        if self.y > HEIGHT + 20:
-            self.y = -random.uniform(10, 120)
-            self.x = random.uniform(0, WIDTH)
 
-    def draw(self, surf, ox=0, oy=0):
-        pygame.draw.circle(surf, self.color, (int(self.x + ox), int(self.y + oy)), self.size)
+class StarLayer:
+    # one parallax layer baked into a tileable surface, scrolled by a single float offset
+    # and drawn with two blits; star count only costs at bake time
+    def __init__(self, n, speed, parallax, size_range, tint, rng=random):
+        self.speed = speed
+        self.parallax = parallax
+        self.offset = 0.0
+        self.prev_offset = 0.0
+        self.stars = []  # (x, y, size) in tile space, for dirty rects
+
+        tile = pygame.Surface((WIDTH, STAR_TILE_H))
+        tile.fill(BLACK)
+        for _ in range(n):
+            x = rng.uniform(0, WIDTH)
+            y = rng.uniform(0, STAR_TILE_H)
+            size = rng.randint(*size_range)
+            # slight random brightness
+            d = rng.randint(-20, 20)
+            col = (clamp(tint[0] + d, 60, 255), clamp(tint[1] + d, 60, 255), clamp(tint[2] + d, 60, 255))
+            # stars on the seam are drawn on both edges so the tile wraps cleanly
+            for wy in (y - STAR_TILE_H, y, y + STAR_TILE_H):
+                if -size <= wy <= STAR_TILE_H + size:
+                    pygame.draw.circle(tile, col, (int(x), int(wy)), size)
+            self.stars.append((int(x), int(y), size))
+        tile.set_colorkey(BLACK, pygame.RLEACCEL)
+        self.tile = tile.convert()
+
+    def update(self, dt, world_speed_mul):
+        self.prev_offset = self.offset
+        self.offset = (self.offset + self.speed * self.parallax * world_speed_mul * dt) % STAR_TILE_H
+
+    def lerp_offset(self, alpha):
+        # offset between the last two ticks (the forward step may have wrapped)
+        return self.prev_offset + ((self.offset - self.prev_offset) % STAR_TILE_H) * alpha
+
+    def draw(self, surf, ox=0, oy=0, alpha=1.0):
+        y = int(self.lerp_offset(alpha)) % STAR_TILE_H + oy
+        surf.blit(self.tile, (ox, y - STAR_TILE_H))
+        surf.blit(self.tile, (ox, y))
+
+    def rects(self, ox=0, oy=0, alpha=1.0):
+        # per-star bounds on screen (dirty-rect mode only)
+        off = int(self.lerp_offset(alpha)) % STAR_TILE_H + oy
+        found = []
+        for x, y, size in self.stars:
+            sy = (y + off) % STAR_TILE_H
+            for wy in (sy - STAR_TILE_H, sy):
+                if -size <= wy < HEIGHT + size:
+                    found.append(pygame.Rect(x + ox - size, wy - size, size * 2 + 1, size * 2 + 1))
+        return found
 
 
 # -------------------------
-# Game objects
+# Game objects (drawing; the entities are dodge_core's)
 # -------------------------
-@dataclass
-class Obstacle:
-    rect: pygame.Rect
-    speed: float
-    amp: float
-    freq: float
-    phase: float
-    base_x: float
+def draw_entity(surf, kind, e, ox=0, oy=0, alpha=1.0):
+    # sprite at the position interpolated between the last two ticks
+    r = e.rect
+    x = int(lerp(e.prev_x, r.x, alpha)) + ox
+    y = int(lerp(e.prev_y, e.y, alpha)) + oy
+    return surf.blit(sprites.get(kind, r.width, r.height), (x, y))
+
+
+def draw_powerup(surf, kind, r: pygame.Rect):
+    if kind == "SHIELD":
+        pygame.draw.rect(surf, PURPLE, r, border_radius=10)
+        pygame.draw.rect(surf, (240, 220, 255), r.inflate(-10, -10), 2, border_radius=8)
+    else:
+        pygame.draw.rect(surf, CYAN, r, border_radius=10)
+        pygame.draw.rect(surf, (230, 255, 255), r.inflate(-10, -10), 2, border_radius=8)
 
-    def update(self, dt, t, world_speed_mul):
-        self.rect.y += int(self.speed * world_speed_mul * dt)
-        if self.amp > 0:
-            # side-to-side wobble
-            self.rect.x = int(self.base_x + math.sin((t + self.phase) * self.freq) * self.amp)
 
-    def draw(self, surf, ox=0, oy=0):
-        pygame.draw.rect(surf, RED, self.rect.move(ox, oy), border_radius=8)
+# -------------------------
+# Sprite cache (pre-rendered shapes)
+# -------------------------
+def paint_sprite(surf, kind, r: pygame.Rect):
+    if kind == "OBSTACLE":
+        pygame.draw.rect(surf, RED, r, border_radius=8)
+    elif kind == "COIN":
+        draw_coin(surf, r)
+    elif kind == "PLAYER":
+        pygame.draw.rect(surf, GREEN, r, border_radius=10)
+    else:
+        draw_powerup(surf, kind, r)
 
 
-@dataclass
-class Coin:
-    rect: pygame.Rect
-    speed: float
+class SpriteCache:
+    # (kind, w, h) -> shape rendered once into a convert_alpha() surface, bounded LRU
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
 
-    def update(self, dt, world_speed_mul):
-        self.rect.y += int(self.speed * world_speed_mul * dt)
+    def get(self, kind, w, h):
+        key = (kind, w, h)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
 
-    def draw(self, surf, ox=0, oy=0):
-        draw_coin(surf, self.rect.move(ox, oy))
+        self.misses += 1
+        sprite = pygame.Surface((w, h), pygame.SRCALPHA)
+        paint_sprite(sprite, kind, sprite.get_rect())
+        sprite = sprite.convert_alpha()
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.maxsize:
+            self.sprites.popitem(last=False)
+        return sprite
 
+    def blit(self, surf, kind, r: pygame.Rect):
+        return surf.blit(self.get(kind, r.width, r.height), r)
 
-@dataclass
-class PowerUp:
-    kind: str  # "SHIELD" | "SLOW"
-    rect: pygame.Rect
-    speed: float
+    def clear(self):
+        self.sprites.clear()
 
-    def update(self, dt, world_speed_mul):
-        self.rect.y += int(self.speed * world_speed_mul * dt)
 
-    def draw(self, surf, ox=0, oy=0):
-        r = self.rect.move(ox, oy)
-        if self.kind == "SHIELD":
-            pygame.draw.rect(surf, PURPLE, r, border_radius=10)
-            pygame.draw.rect(surf, (240, 220, 255), r.inflate(-10, -10), 2, border_radius=8)
-        else:
-            pygame.draw.rect(surf, CYAN, r, border_radius=10)
-            pygame.draw.rect(surf, (230, 255, 255), r.inflate(-10, -10), 2, border_radius=8)
+sprites = SpriteCache()
 
 
 # -------------------------
-# Spawners
+# Vectorized entity store drawing (--vectorized)
 # -------------------------
-def spawn_obstacle(level: int) -> Obstacle:
-    w = random.randint(34, 90)
-    h = random.randint(34, 90)
-    x = random.randint(0, WIDTH - w)
-    y = -h
-
-    speed = 235 + level * 20 + random.randint(-25, 45)
-
-    # add wobble more often at higher levels
-    wobble_chance = clamp(0.20 + level * 0.03, 0.20, 0.70)
-    if random.random() < wobble_chance:
-        amp = random.uniform(35, 120) * clamp(level / 6.0, 0.3, 1.0)
-        freq = random.uniform(1.6, 3.0)
-        phase = random.uniform(0, 10)
-    else:
-        amp, freq, phase = 0.0, 0.0, 0.0
-
-    return Obstacle(pygame.Rect(x, y, w, h), speed, amp, freq, phase, float(x))
-
-
-def spawn_coin(level: int) -> Coin:
-    size = random.randint(22, 30)
-    x = random.randint(0, WIDTH - size)
-    y = -size
-    speed = 250 + level * 11 + random.randint(-10, 25)
-    return Coin(pygame.Rect(x, y, size, size), speed)
-
-
-def spawn_powerup(level: int) -> PowerUp:
-    size = 28
-    x = random.randint(0, WIDTH - size)
-    y = -size
-    speed = 245 + level * 9 + random.randint(-10, 20)
-    kind = "SHIELD" if random.random() < 0.55 else "SLOW"
-    return PowerUp(kind, pygame.Rect(x, y, size, size), speed)
+def draw_arrays(arrays, surf, ox=0, oy=0, drawn=None, alpha=1.0):
+    # every entity of an EntityArrays store in one blits() call
+    # drawn: optional list collecting the blitted rects
+    blits = []
+    for cols in (arrays.obstacles, arrays.coins, arrays.powerups):
+        if not cols.n:
+            continue
+        if cols is arrays.obstacles:
+            kinds = ["OBSTACLE"] * cols.n
+        elif cols is arrays.coins:
+            kinds = ["COIN"] * cols.n
+        else:
+            kinds = [POWERUP_KINDS[int(k)] for k in cols["kind"].tolist()]
+        px, py = cols["px"], cols["py"]
+        xs = (px + (cols["x"] - px) * alpha).astype(np.int32) + ox
+        ys = (py + (cols["y"] - py) * alpha).astype(np.int32) + oy
+        sizes = zip(cols["w"].astype(np.int32).tolist(), cols["h"].astype(np.int32).tolist())
+        for kind, (w, h), x, y in zip(kinds, sizes, xs.tolist(), ys.tolist()):
+            blits.append((sprites.get(kind, w, h), (x, y)))
+    rects = surf.blits(blits)
+    if drawn is not None:
+        drawn.extend(rects)
 
 
 # -------------------------
-# Game (v2)
+# Post-processing (shake + overlays)
 # -------------------------
-class Game:
+class FlashFX:
+    # white hit flash from one persistent surface with per-surface alpha
     def __init__(self):
-        self.best_time = load_best()
-        self.reset_all()
-
-    def reset_all(self):
-        self.state = "MENU"  # MENU / PLAY
-        self.game = self.reset_game()
-
-        # input edge tracking
-        self.p_was = False
-        self.shift_was = False
-        self.space_was = False
-
-        # background
-        self.stars_far = self.make_stars(55, speed_range=(30, 60), size_range=(1, 2), tint=(110, 110, 110))
-        self.stars_mid = self.make_stars(40, speed_range=(70, 120), size_range=(1, 3), tint=(160, 160, 160))
-        self.stars_near = self.make_stars(18, speed_range=(160, 240), size_range=(2, 3), tint=(220, 220, 220))
+        self.overlay = pygame.Surface((WIDTH, HEIGHT)).convert()
+        self.overlay.fill((255, 255, 255))
 
-    def reset_game(self):
-        player = pygame.Rect(WIDTH // 2 - 25, HEIGHT - 95, 50, 50)
-
-        # Movement smoothing (accel)
-        player_speed = 310.0
-        vel_x = 0.0
-        accel = 2600.0
-        friction = 3600.0
-
-        # Dash
-        dash_speed = 740.0
-        dash_duration = 0.12
-        dash_cooldown = 0.55
-        dash_until = 0.0
-        dash_cd_until = 0.0
-
-        # Core
-        hp = 3
-        invincible_until = 0.0
-
-        # v2 powerups
-        shield = 0  # hit buffer
-        slow_until = 0.0
-
-        # scoring
-        score = 0
-        combo = 0
-        combo_timer = 0.0
-        combo_keep = 2.0
-
-        t = 0.0
-
-        obstacles = []
-        coins = []
-        powerups = []
-        particles = []
-
-        obs_timer = 0.0
-        coin_timer = 0.0
-        pu_timer = 0.0
-
-        paused = False
-        game_over = False
-
-        # screen shake / flash
-        shake = 0.0
-        flash = 0.0
-
-        return {
-            "player": player,
-            "player_speed": player_speed,
-            "vel_x": vel_x,
-            "accel": accel,
-            "friction": friction,
-            "dash_speed": dash_speed,
-            "dash_duration": dash_duration,
-            "dash_cooldown": dash_cooldown,
-            "dash_until": dash_until,
-            "dash_cd_until": dash_cd_until,
-            "hp": hp,
-            "invincible_until": invincible_until,
-            "shield": shield,
-            "slow_until": slow_until,
-            "score": score,
-            "combo": combo,
-            "combo_timer": combo_timer,
-            "combo_keep": combo_keep,
-            "t": t,
-            "obstacles": obstacles,
-            "coins": coins,
-            "powerups": powerups,
-            "particles": particles,
-            "obs_timer": obs_timer,
-            "coin_timer": coin_timer,
-            "pu_timer": pu_timer,
-            "paused": paused,
-            "game_over": game_over,
-            "shake": shake,
-            "flash": flash,
-        }
-
-    def make_stars(self, n, speed_range, size_range, tint):
-        stars = []
-        for _ in range(n):
-            x = random.uniform(0, WIDTH)
-            y = random.uniform(0, HEIGHT)
-            spd = random.uniform(*speed_range)
-            size = random.randint(*size_range)
-            # slight random brightness
-            d = random.randint(-20, 20)
-            col = (clamp(tint[0] + d, 60, 255), clamp(tint[1] + d, 60, 255), clamp(tint[2] + d, 60, 255))
-            stars.append(Star(x, y, spd, size, col))
-        return stars
-
-    def quit(self):
-        pygame.quit()
-        sys.exit()
-
-    def world_speed_mul(self):
-        # SLOW powerup effect
-        now_t = self.game["t"]
-        if now_t < self.game["slow_until"]:
-            # ease in/out
-            remain = self.game["slow_until"] - now_t
-            t = clamp(remain / 3.0, 0.0, 1.0)
-            return lerp(0.55, 1.0, 1.0 - t)  # slower near the start, back to 1
-        return 1.0
-
-    def update_best(self):
-        if (not self.game["game_over"]) and (self.game["t"] > self.best_time):
-            self.best_time = self.game["t"]
-            save_best(self.best_time)
+    def apply(self, surf, g):
+        if g["flash"] > 0:
+            self.overlay.set_alpha(int(255 * clamp(g["flash"], 0.0, 0.25) / 0.25))
+            surf.blit(self.overlay, (0, 0))
+
+
+class PostFX:
+    # while shaking, the world is drawn into a persistent offscreen buffer and shown
+    # with one offset blit; otherwise it is drawn straight to the screen.
+    # effects (apply(surf, g)) run after the HUD and must reuse their own surfaces.
+    def __init__(self, rng=random, target=None):
+        self.target = target or screen  # final frame (the display or an offscreen surface)
+        self.world = pygame.Surface((WIDTH, HEIGHT)).convert()
+        self.effects = [FlashFX()]
+        self.rng = rng
+        self.ox = self.oy = 0
+
+    def begin(self, shake):
+        self.ox = self.oy = 0
+        if shake > 0:
+            self.ox = int(self.rng.uniform(-shake, shake))
+            self.oy = int(self.rng.uniform(-shake * 0.7, shake * 0.7))
+        target = self.world if (self.ox or self.oy) else self.target
+        target.fill(BLACK)
+        return target
+
+    def compose(self, dst):
+        ox, oy = self.ox, self.oy
+        if not (ox or oy):
+            return
+        dst.blit(self.world, (ox, oy))
+        # clear the strips the shifted world no longer covers
+        if ox:
+            dst.fill(BLACK, (0 if ox > 0 else WIDTH + ox, 0, abs(ox), HEIGHT))
+        if oy:
+            dst.fill(BLACK, (0, 0 if oy > 0 else HEIGHT + oy, WIDTH, abs(oy)))
 
-    def apply_hit(self):
-        g = self.game
+    def apply(self, dst, g):
+        for fx in self.effects:
+            fx.apply(dst, g)
 
-        if g["shield"] > 0:
-            g["shield"] -= 1
-            g["invincible_until"] = g["t"] + 0.55
-            g["shake"] = max(g["shake"], 10.0)
-            g["flash"] = max(g["flash"], 0.18)
-            emit_particles(g["particles"], g["player"].centerx, g["player"].centery, PURPLE, count=18, power=260)
-            return
 
-        g["hp"] -= 1
-        g["invincible_until"] = g["t"] + 0.85
-        g["shake"] = max(g["shake"], 14.0)
-        g["flash"] = max(g["flash"], 0.22)
+# -------------------------
+# Pixel observations (render_mode="offscreen")
+# -------------------------
+class PixelFrames:
+    # the rendered frame as NumPy views (no copy) via surfarray; scaled / gray
+    # variants are produced by pygame.transform into surfaces cached per size
+    def __init__(self, target):
+        self.target = target
+        self.cache = {}
+
+    def buffer(self, key, size):
+        surf = self.cache.get(key)
+        if surf is None:
+            surf = self.cache[key] = pygame.Surface(size, 0, self.target)
+        return surf
+
+    def surface(self, size=None, gray=False):
+        src = self.target
+        if size is not None and tuple(size) != src.get_size():
+            src = pygame.transform.smoothscale(src, size, self.buffer(("scale", tuple(size)), size))
+        if gray:
+            src = pygame.transform.grayscale(src, self.buffer(("gray", src.get_size()), src.get_size()))
+        return src
+
+    @contextmanager
+    def view(self, size=None, gray=False):
+        # (H, W, 3) uint8, or (H, W) when gray, valid inside the with block only:
+        # the view locks its surface and the next frame draws over it (copy to keep)
+        surf = self.surface(size, gray)
+        arr = pygame.surfarray.pixels_red(surf) if gray else pygame.surfarray.pixels3d(surf)
+        try:
+            yield arr.swapaxes(0, 1)
+        finally:
+            del arr  # drop the surface lock
 
-        emit_particles(g["particles"], g["player"].centerx, g["player"].centery, RED, count=18, power=260)
-        g["combo"] = max(0, g["combo"] - 2)
-        g["combo_timer"] = g["combo_keep"] * 0.5 if g["combo"] > 0 else 0.0
 
-        if g["hp"] <= 0:
-            g["game_over"] = True
+# -------------------------
+# Dirty-rectangle presenting (--render dirty)
+# -------------------------
+class DirtyRects:
+    # the frame is still drawn in full, but only regions that changed this frame
+    # or last frame are pushed with display.update(); anything global -> full flip
+    MAX_AREA = WIDTH * HEIGHT // 2
 
-    def update(self, dt):
-        g = self.game
-        keys = pygame.key.get_pressed()
+    def __init__(self):
+        self.prev = []
+        self.full = True
 
-        if keys[pygame.K_ESCAPE]:
-            self.quit()
+    def present(self, drawn, full=False):
+        rects = [r for r in drawn if r]
+        if full or self.full or sum(r.w * r.h for r in rects) > self.MAX_AREA:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.prev + rects)
+        self.prev = rects
+        self.full = False
 
-        # ---------------- MENU ----------------
-        if self.state == "MENU":
-            space_down = keys[pygame.K_SPACE]
-            if space_down and not self.space_was:
-                self.game = self.reset_game()
-                self.state = "PLAY"
-            self.space_was = space_down
-            return
 
-        # ---------------- PLAY ----------------
-        # Pause toggle
-        p_down = keys[pygame.K_p]
-        if p_down and not self.p_was and (not g["game_over"]):
-            g["paused"] = not g["paused"]
-        self.p_was = p_down
+# -------------------------
+# Fixed-timestep loop
+# -------------------------
+class FixedStep:
+    # the simulation advances in fixed ticks; frames render the leftover fraction
+    # (alpha) between the last two ticks. catch-up is capped so a long stall
+    # slows the game down instead of spiralling.
+    def __init__(self, tick_rate=FPS, max_steps=8):
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.acc = 0.0
+
+    def advance(self, frame_dt):
+        self.acc += frame_dt
+        steps = int(self.acc / self.dt)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.acc = 0.0
+        else:
+            self.acc -= steps * self.dt
+        return steps, self.acc / self.dt
 
-        # Game over inputs
-        if g["game_over"]:
-            if keys[pygame.K_r]:
-                self.game = self.reset_game()
-                g = self.game
-            if keys[pygame.K_m]:
-                self.state = "MENU"
-            # still update particles & background a bit
-            self.update_background(dt)
-            self.update_particles(dt * 0.9)
-            self.update_shake_flash(dt)
-            return
 
-        if g["paused"]:
-            self.update_background(dt * 0.25)
-            self.update_particles(dt * 0.18)
-            self.update_shake_flash(dt * 0.25)
+# -------------------------
+# Frame profiler overlay (F3)
+# -------------------------
+class OverlayProfiler(FrameProfiler):
+    # FrameProfiler (timing, --profile export) plus the on-screen panel; the overlay
+    # enables timing too, so phases are measured whenever it shows
+    REFRESH = 10  # overlay panel re-composed every N frames
+    GRAPH_MS = 50.0  # graph full scale
+    PANEL_W = 330
+    LINE_H = 16
+    GRAPH_H = 62
+
+    def __init__(self, export_path=None):
+        super().__init__(export_path)
+        self.overlay = False
+        self.panel = None
+        self.pos = (WIDTH - self.PANEL_W - 10, 136)
+        self.partial = False  # timing switched on mid-frame: start() skipped this frame
+
+    def toggle_overlay(self):
+        was = self.enabled
+        self.overlay = not self.overlay
+        self.enabled = self.overlay or self.out is not None
+        self.partial = self.enabled and not was
+
+    def start(self):
+        self.partial = False
+        super().start()
+
+    def end(self, counts):
+        if self.partial:
+            # F3 pressed during this frame: it has no start time, so it is dropped
+            self.partial = False
             return
+        super().end(counts)
+        if self.overlay and (self.panel is None or self.count % self.REFRESH == 0):
+            self.panel = self.compose(counts)
+
+    def compose(self, counts):
+        p50, p95, p99 = self.percentiles([t for t, _ in self.frames])
+        rows = [(f"frame ms  p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}", "")]
+        names = []
+        for _, phases in self.frames:
+            names.extend(k for k in phases if k not in names)
+        for name in names:
+            _, q95, _ = self.percentiles([ph.get(name, 0.0) for _, ph in self.frames])
+            rows.append((name, f"p95 {q95:.2f} ms"))
+        rows.append(("  ".join(f"{k} {v}" for k, v in counts.items()), ""))
+
+        top, h = 8 + len(rows) * self.LINE_H, self.GRAPH_H
+        panel = pygame.Surface((self.PANEL_W, top + h + 8), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        f = pick_font("small")
+        for i, (left, right) in enumerate(rows):
+            # plain render: these strings change every refresh and would churn render_text's cache
+            y = 6 + i * self.LINE_H
+            panel.blit(f.render(left, True, WHITE), (8, y))
+            if right:
+                panel.blit(f.render(right, True, WHITE), (150, y))
+
+        # frame-time graph (newest at the right), with 16.7ms / 33.3ms guides
+        for ms, color in ((1000 / 60, GREEN), (1000 / 30, RED)):
+            gy = top + h - int(h * min(ms / self.GRAPH_MS, 1.0))
+            pygame.draw.line(panel, color, (8, gy), (self.PANEL_W - 8, gy))
+        step = (self.PANEL_W - 16) / self.HISTORY
+        pts = [
+            (8 + i * step, top + h - h * min(t * 1e3 / self.GRAPH_MS, 1.0)) for i, (t, _) in enumerate(self.frames)
+        ]
+        if len(pts) > 1:
+            pygame.draw.lines(panel, GOLD_INNER, False, pts)
+        return panel
 
-        # time
-        g["t"] += dt
-        now_t = g["t"]
-        level = 1 + int(now_t // 10)
-
-        # world speed
-        wmul = self.world_speed_mul()
+    def draw(self, surf):
+        if not self.overlay or self.panel is None:
+            return None
+        return surf.blit(self.panel, self.pos)
 
-        # Dash (edge)
-        shift_down = keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]
-        can_dash = (now_t >= g["dash_cd_until"]) and (now_t >= g["dash_until"])
 
-        if shift_down and not self.shift_was and can_dash:
-            g["dash_until"] = now_t + g["dash_duration"]
-            g["dash_cd_until"] = now_t + g["dash_cooldown"]
-            g["shake"] = max(g["shake"], 6.0)
-            emit_particles(g["particles"], g["player"].centerx, g["player"].centery, BLUE, count=10, power=170)
+# -------------------------
+# Run history (SQLite)
+# -------------------------
+RUNS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ended REAL NOT NULL,  -- unix time
+    day TEXT NOT NULL,  -- local date, YYYY-MM-DD
+    time REAL NOT NULL,
+    score INTEGER NOT NULL,
+    max_combo INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    frame_p50_ms REAL,  -- NULL when no frames were drawn
+    frame_p95_ms REAL,
+    frame_p99_ms REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (time);
+CREATE INDEX IF NOT EXISTS runs_by_day ON runs (day, score);
+"""
+RUNS_INSERT = "INSERT INTO runs VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+class RunHistory:
+    # every finished run in a local SQLite database. One worker thread owns the
+    # connection: add() and page() only queue work, so the frame loop never waits on
+    # disk. Runs queued together go in one transaction; pages are keyset queries on
+    # the indexes (no OFFSET scans) and come back through self.pages.
+    def __init__(self, path=RUNS_PATH):
+        self.path = Path(path)
+        self.jobs = queue.Queue()
+        self.gen = 0  # bumped by add(): pages of older generations are stale
+        self.pages = {}  # (gen, board, page) -> rows, written by the worker
+        self.cursors = {}  # (gen, board, page) -> (sort key, id) of its last row
+        self.asked = set()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def add(self, run):
+        # run: (ended, day, time, score, max_combo, level, hits, seed, frame seconds)
+        self.gen += 1
+        self.pages.clear()
+        self.cursors.clear()
+        self.asked.clear()
+        self.jobs.put(("add", run))
+
+    def page(self, board, page):
+        # rows (time, score, max_combo, level, day) of one BOARD_ROWS page, or None
+        # while it loads; pages must be asked for in order (the next starts after the last row)
+        key = (self.gen, board, page)
+        rows = self.pages.get(key)
+        if rows is None and key not in self.asked:
+            self.asked.add(key)
+            self.jobs.put(("page", key, time.strftime("%Y-%m-%d")))
+        return rows
+
+    def close(self):
+        # write what is queued and stop
+        self.jobs.put(None)
+        self.thread.join()
+
+    def run(self):
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")  # fewer syncs per commit (SD cards)
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(RUNS_SCHEMA)
+        stop = False
+        while not stop:
+            jobs = [self.jobs.get()]
+            while True:  # take everything queued: its runs share one transaction
+                try:
+                    jobs.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            runs = [self.row(job[1]) for job in jobs if job is not None and job[0] == "add"]
+            if runs:
+                with db:
+                    db.executemany(RUNS_INSERT, runs)
+            for job in jobs:
+                if job is None:
+                    stop = True
+                elif job[0] == "page":
+                    self.load(db, *job[1:])
+        db.close()
+
+    def row(self, run):
+        *fields, frames = run
+        if not frames:
+            return (*fields, None, None, None)
+        ms = sorted(frames)
+        n = len(ms)
+        return (*fields, *(ms[min(n - 1, int(q * n))] * 1e3 for q in (0.50, 0.95, 0.99)))
+
+    def load(self, db, key, today):
+        gen, board, page = key
+        after = self.cursors.get((gen, board, page - 1)) if page else None
+        if page and after is None:
+            rows = []  # the previous page was the last
+        else:
+            order = "time" if board == "time" else "score"
+            where, args = [], []
+            if board == "today":
+                where.append("day = ?")
+                args.append(today)
+            if after is not None:
+                where.append(f"({order}, id) < (?, ?)")
+                args.extend(after)
+            sql = f"SELECT time, score, max_combo, level, day, {order}, id FROM runs"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += f" ORDER BY {order} DESC, id DESC LIMIT {BOARD_ROWS}"
+            rows = db.execute(sql, args).fetchall()
+        if rows:
+            self.cursors[key] = rows[-1][5:]
+        self.pages[key] = tuple(r[:5] for r in rows)
 
-        self.shift_was = shift_down
 
-        # Movement (smooth accel)
-        move_dir = 0
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            move_dir -= 1
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            move_dir += 1
+# -------------------------
+# Game (v2): the pygame front end
+# -------------------------
+# Sim.effect() bursts -> particles (color, count, power)
+EFFECTS = {
+    "dash": (BLUE, 10, 170),
+    "coin": (GOLD_INNER, 12, 200),
+    "shield": (PURPLE, 16, 240),
+    "slow": (CYAN, 16, 240),
+    "hit": (RED, 18, 260),
+    "shield_hit": (PURPLE, 18, 260),
+}
+
+
+class Game(Sim):
+    # the rules are dodge_core.Sim's; this adds keyboard input, particles, the starfield,
+    # rendering and the saved records (best time, run history) through Sim's hooks
+    def __init__(
+        self,
+        input_source=None,
+        persist=True,
+        vectorized=False,
+        max_particles=MAX_PARTICLES,
+        render_mode="flip",
+        star_density=1.0,
+        seed=None,
+        profile_path=None,
+        cosmetics=True,
+        level=None,
+        spawn_thread=True,
+    ):
+        # input_source: callable returning an IN_* mask or a TickInput (keyboard by default)
+        # persist: read/write best_time.txt and runs.db (off for simulations)
+        # max_particles: hard cap of the particle pool (oldest recycled first)
+        # render_mode: "flip" (whole frame), "dirty" (changed regions only) or
+        #              "offscreen" (never presented; read it through self.pixels)
+        # star_density: starfield density multiplier (baked, no per-star cost)
+        # profile_path: write per-frame phase timings there (JSON lines)
+        # cosmetics: animate stars and particles
+        # vectorized, seed, level, spawn_thread: see Sim
+        seed = seed if seed is not None else random.randrange(SEED_LIMIT)
+        self.fx_rng = random.Random(f"{seed}/fx")  # shake
+        self.bg_rng = random.Random(f"{seed}/bg")  # starfield
+        self.persist = persist
+        self.star_density = star_density
+        self.cosmetics = cosmetics
+        self.particles = ParticlePool(max_particles, rng=np.random.default_rng([seed, 1]))
+        self.labels = {name: Label() for name in HUD_LABELS}
+        self.layers = ScreenLayers()
+        self.dirty = DirtyRects() if render_mode == "dirty" else None
+        self.offscreen = render_mode == "offscreen"
+        display = init_display(hidden=self.offscreen)
+        self.display_held = True  # released once, by close()
+        self.target = pygame.Surface((WIDTH, HEIGHT)).convert() if self.offscreen else display
+        self.pixels = PixelFrames(self.target)
+        self.post = PostFX(self.fx_rng, self.target)
+        self.drawn = []  # rects touched by moving/changing things this frame
+        self.last_screen = None
+        self.best_store = BestTimeStore() if persist else None
+        self.history = RunHistory() if persist else None
+        self.board = 0  # index into BOARDS
+        self.board_page = 0
+        self.board_was = 0  # menu keys held last tick
+        self.run_frames = []  # frame times (s) of the current run, see note_frame
+        profiler = OverlayProfiler(profile_path)
+        super().__init__(input_source or read_keyboard, vectorized, seed, level, spawn_thread, profiler)
+        self.best_time = self.best_store.best if persist else 0.0
 
-        in_dash = now_t < g["dash_until"]
-        max_speed = g["dash_speed"] if in_dash else g["player_speed"]
+    def reset_all(self):
+        super().reset_all()
 
-        if move_dir != 0:
-            g["vel_x"] += move_dir * g["accel"] * dt
-        else:
-            # friction to stop
-            if g["vel_x"] > 0:
-                g["vel_x"] = max(0.0, g["vel_x"] - g["friction"] * dt)
-            elif g["vel_x"] < 0:
-                g["vel_x"] = min(0.0, g["vel_x"] + g["friction"] * dt)
-
-        g["vel_x"] = clamp(g["vel_x"], -max_speed, max_speed)
-        g["player"].x += int(g["vel_x"] * dt)
-        g["player"].x = clamp(g["player"].x, 0, WIDTH - g["player"].width)
-
-        # Spawn: obstacle
-        g["obs_timer"] += dt
-        obs_interval = max(0.18, 0.58 - level * 0.03)
-        if g["obs_timer"] >= obs_interval:
-            g["obs_timer"] = 0.0
-            g["obstacles"].append(spawn_obstacle(level))
-
-        # Spawn: coin
-        g["coin_timer"] += dt
-        coin_interval = max(0.42, 0.95 - level * 0.02)
-        if g["coin_timer"] >= coin_interval:
-            g["coin_timer"] = 0.0
-            g["coins"].append(spawn_coin(level))
-
-        # Spawn: powerup (rare)
-        g["pu_timer"] += dt
-        pu_interval = max(7.5, 13.0 - level * 0.25)
-        if g["pu_timer"] >= pu_interval:
-            g["pu_timer"] = 0.0
-            g["powerups"].append(spawn_powerup(level))
-
-        # Move objects
-        for o in g["obstacles"]:
-            o.update(dt, now_t, wmul)
-        for c in g["coins"]:
-            c.update(dt, wmul)
-        for pu in g["powerups"]:
-            pu.update(dt, wmul)
-
-        # Remove off-screen
-        g["obstacles"] = [o for o in g["obstacles"] if o.rect.y < HEIGHT + 170]
-        g["coins"] = [c for c in g["coins"] if c.rect.y < HEIGHT + 140]
-        g["powerups"] = [p for p in g["powerups"] if p.rect.y < HEIGHT + 160]
-
-        # Combo decay
-        if g["combo"] > 0:
-            g["combo_timer"] -= dt
-            if g["combo_timer"] <= 0:
-                g["combo"] = max(0, g["combo"] - 1)
-                g["combo_timer"] = g["combo_keep"] * 0.6 if g["combo"] > 0 else 0.0
-
-        # Coin collision
-        new_coins = []
-        for c in g["coins"]:
-            if g["player"].colliderect(c.rect):
-                g["combo"] += 1
-                g["combo_timer"] = g["combo_keep"]
-                mult = 1 + min(g["combo"] // 5, 6)
-                # small level scaling
-                g["score"] += int(10 * mult * (1.0 + level * 0.06))
-                g["shake"] = max(g["shake"], 3.0)
-                emit_particles(g["particles"], c.rect.centerx, c.rect.centery, GOLD_INNER, count=12, power=200)
-            else:
-                new_coins.append(c)
-        g["coins"] = new_coins
-
-        # Powerup collision
-        new_pu = []
-        for pu in g["powerups"]:
-            if g["player"].colliderect(pu.rect):
-                if pu.kind == "SHIELD":
-                    g["shield"] = min(2, g["shield"] + 1)
-                    g["score"] += 80 + level * 8
-                    emit_particles(g["particles"], pu.rect.centerx, pu.rect.centery, PURPLE, count=16, power=240)
-                else:
-                    g["slow_until"] = max(g["slow_until"], now_t + 3.2)
-                    g["score"] += 70 + level * 6
-                    emit_particles(g["particles"], pu.rect.centerx, pu.rect.centery, CYAN, count=16, power=240)
-                g["combo"] = max(g["combo"], 2)  # small assist
-                g["combo_timer"] = max(g["combo_timer"], 1.2)
-                g["shake"] = max(g["shake"], 6.0)
-            else:
-                new_pu.append(pu)
-        g["powerups"] = new_pu
-
-        # Obstacle collision (invincibility)
-        invincible = now_t < g["invincible_until"]
-        if not invincible:
-            for o in g["obstacles"]:
-                if g["player"].colliderect(o.rect):
-                    self.apply_hit()
-                    break
+        # background (far / mid / near)
+        self.star_layers = [
+            self.make_stars(55, speed=45, parallax=0.5, size_range=(1, 2), tint=(110, 110, 110)),
+            self.make_stars(40, speed=95, parallax=0.85, size_range=(1, 3), tint=(160, 160, 160)),
+            self.make_stars(18, speed=200, parallax=1.1, size_range=(2, 3), tint=(220, 220, 220)),
+        ]
 
-        # background/particles/shake
-        self.update_background(dt)
-        self.update_particles(dt)
-        self.update_shake_flash(dt)
+    def reset_game(self):
+        g = super().reset_game()
+        self.run_frames = []
+        self.particles.clear()
+        g["particles"] = self.particles
+        return g
+
+    def make_stars(self, n, speed, parallax, size_range, tint):
+        # n is stars per screen height at density 1.0
+        count = int(round(n * self.star_density * STAR_TILE_H / HEIGHT))
+        return StarLayer(count, speed, parallax, size_range, tint, rng=self.bg_rng)
+
+    def close(self):
+        super().close()
+        if self.best_store is not None:
+            self.best_store.close()
+        if self.history is not None:
+            self.history.close()
+        if self.display_held:
+            self.display_held = False
+            close_display()
+
+    def counts(self):
+        return dict(super().counts(), particles=len(self.particles))
+
+    def note_frame(self, frame_dt):
+        # frame times of the run in play, for its run-history percentiles
+        if self.state == "PLAY" and not self.game["game_over"]:
+            self.run_frames.append(frame_dt)
+
+    def run_record(self):
+        # RunHistory.add() fields of the run that just ended
+        g = self.game
+        now = time.time()
+        day = time.strftime("%Y-%m-%d", time.localtime(now))
+        level = 1 + int(g["t"] // 10)
+        return now, day, g["t"], g["score"], g["max_combo"], level, g["hits"], self.seed, self.run_frames
+
+    def page_board(self, inp):
+        # menu leaderboard keys (edges)
+        pressed = inp & ~self.board_was
+        self.board_was = inp
+        if pressed & IN_DASH:
+            self.board = (self.board + 1) % len(BOARDS)
+            self.board_page = 0
+        if pressed & IN_LEFT:
+            self.board_page = max(0, self.board_page - 1)
+        if pressed & IN_RIGHT:
+            rows = self.history.page(BOARDS[self.board], self.board_page)
+            if rows is not None and len(rows) == BOARD_ROWS:
+                self.board_page += 1
+
+    def menu_keys(self, inp):
+        if self.history is not None:
+            self.page_board(inp)
 
-        # Best time update
-        self.update_best()
+    def update_best(self):
+        new = super().update_best()
+        if new and self.best_store is not None:
+            self.best_store.update(self.best_time)
+        return new
+
+    def end_run(self):
+        if self.best_store is not None:
+            self.best_store.flush()
+        if self.history is not None:
+            self.history.add(self.run_record())
+            self.board_page = 0  # the board changed; pages are rebuilt from the top
+
+    def effect(self, kind, x, y):
+        color, count, power = EFFECTS[kind]
+        emit_particles(self.particles, x, y, color, count=count, power=power)
 
     def update_background(self, dt):
+        if not self.cosmetics:
+            return
+        self.bg_moved = True
         wmul = self.world_speed_mul()
-        for s in self.stars_far:
-            s.update(dt, wmul * 0.5)
-        for s in self.stars_mid:
-            s.update(dt, wmul * 0.85)
-        for s in self.stars_near:
-            s.update(dt, wmul * 1.1)
+        for layer in self.star_layers:
+            layer.update(dt, wmul)
+        self.profiler.lap("background")
 
     def update_particles(self, dt):
-        g = self.game
-        for p in g["particles"]:
-            p.update(dt)
-        g["particles"] = [p for p in g["particles"] if p.alive()]
-
-    def update_shake_flash(self, dt):
-        g = self.game
-        g["shake"] = max(0.0, g["shake"] - 26.0 * dt)
-        g["flash"] = max(0.0, g["flash"] - 2.8 * dt)
+        if not self.cosmetics:
+            return
+        self.game["particles"].update(dt)
+        self.profiler.lap("particles")
 
-    def render(self):
+    def render(self, alpha=1.0):
+        # alpha: fraction of a tick past the last update (fixed-timestep interpolation)
         g = self.game
+        wa = alpha if self.world_moved else 1.0
+        ba = alpha if self.bg_moved else 1.0
 
-        # shake offset
-        ox = oy = 0
-        if g["shake"] > 0:
-            amp = g["shake"]
-            ox = int(random.uniform(-amp, amp))
-            oy = int(random.uniform(-amp * 0.7, amp * 0.7))
-
-        screen.fill(BLACK)
+        # world layer (shaken as a whole by the post stage)
+        post = self.post
+        prof = self.profiler
+        screen = self.target
+        world = post.begin(g["shake"])
+        drawn = self.drawn
+        drawn.clear()
 
         # background stars
-        for s in self.stars_far:
-            s.draw(screen, ox=ox, oy=oy)
-        for s in self.stars_mid:
-            s.draw(screen, ox=ox, oy=oy)
-        for s in self.stars_near:
-            s.draw(screen, ox=ox, oy=oy)
+        for layer in self.star_layers:
+            layer.draw(world, alpha=ba)
+            if self.dirty is not None:
+                drawn.extend(layer.rects(alpha=ba))
+        prof.lap("draw_stars")
 
         if self.state == "MENU":
-            draw_text_center("DODGE GAME", 150, use_big=True)
-            draw_text_center("Press SPACE to Start", 290, color=GOLD_INNER, use_mid=True)
-            draw_text_center("Move: LEFT/RIGHT or A/D   Dash: SHIFT   Pause: P", 360)
-            draw_text_center("Coins = Score + Combo | PowerUps: Shield / Slow", 402)
-            draw_text_center("Red blocks = Damage", 444)
-            draw_text_center(f"Best Time: {self.best_time:.1f}s", 510, color=GREEN)
-            pygame.display.flip()
+            post.compose(screen)
+            key = best = f"{self.best_time:.1f}"
+            lines = menu_lines(self.best_time)
+            if self.history is not None:
+                board = BOARDS[self.board]
+                rows = self.history.page(board, self.board_page)
+                key = (best, board, self.board_page, rows)
+                lines += board_lines(board, self.board_page, rows)
+            self.layers.blit(screen, "MENU", key, lines)
+            prof.lap("draw_overlay")
+            drawn.append(prof.draw(screen))
+            prof.lap("profiler")
+            self.present(("MENU", key, prof.overlay), full=g["shake"] > 0)
+            prof.lap("flip")
             return
 
         # objects
+        if g["arrays"] is not None:
+            draw_arrays(g["arrays"], world, drawn=drawn, alpha=wa)
         for o in g["obstacles"]:
-            o.draw(screen, ox=ox, oy=oy)
+            drawn.append(draw_entity(world, "OBSTACLE", o, alpha=wa))
         for c in g["coins"]:
-            c.draw(screen, ox=ox, oy=oy)
+            drawn.append(draw_entity(world, "COIN", c, alpha=wa))
         for pu in g["powerups"]:
-            pu.draw(screen, ox=ox, oy=oy)
-        for p in g["particles"]:
-            p.draw(screen)
+            drawn.append(draw_entity(world, pu.kind, pu, alpha=wa))
+        prof.lap("draw_entities")
+        drawn.append(g["particles"].draw(world))
+        prof.lap("draw_particles")
 
         # player
+        p = g["player"]
+        player = pygame.Rect(int(lerp(g["player_prev_x"], g["player_x"], wa)), p.y, p.w, p.h)
         invincible = g["t"] < g["invincible_until"]
         if (not invincible) or (int(g["t"] * 12) % 2 == 0):
-            pygame.draw.rect(screen, GREEN, g["player"].move(ox, oy), border_radius=10)
+            sprites.blit(world, "PLAYER", player)
+        drawn.append(player)
 
         # v2: shield ring visual
         if g["shield"] > 0:
-            cx, cy = g["player"].center
+            cx, cy = player.center
             r = 36
-            pygame.draw.circle(screen, PURPLE, (cx + ox, cy + oy), r, 3)
+            drawn.append(pygame.draw.circle(world, PURPLE, (cx, cy), r, 3))
+        prof.lap("draw_entities")
+
+        post.compose(screen)
+        prof.lap("compose")
 
         # HUD
+        # (labels only re-render when their text changes)
         level = 1 + int(g["t"] // 10)
-        ui_time = font.render(f"Time: {g['t']:.1f}s", True, WHITE)
-        ui_level = font.render(f"Level: {level}", True, WHITE)
-        ui_hp = font.render(f"HP: {g['hp']}", True, WHITE)
-        ui_score = font.render(f"Score: {g['score']}", True, WHITE)
-        ui_combo = font.render(f"Combo: {g['combo']}", True, GOLD_INNER if g["combo"] > 0 else WHITE)
-        ui_best = font.render(f"Best: {self.best_time:.1f}s", True, GREEN)
-        ui_shield = font.render(f"Shield: {g['shield']}", True, PURPLE if g["shield"] > 0 else (160, 160, 160))
+        labels = self.labels
+        ui_time = labels["time"].render(f"Time: {g['t']:.1f}s")
+        ui_level = labels["level"].render(f"Level: {level}")
+        ui_hp = labels["hp"].render(f"HP: {g['hp']}")
+        ui_score = labels["score"].render(f"Score: {g['score']}")
+        ui_combo = labels["combo"].render(f"Combo: {g['combo']}", GOLD_INNER if g["combo"] > 0 else WHITE)
+        ui_best = labels["best"].render(f"Best: {self.best_time:.1f}s", GREEN)
+        ui_shield = labels["shield"].render(f"Shield: {g['shield']}", PURPLE if g["shield"] > 0 else (160, 160, 160))
 
         screen.blit(ui_time, (20, 16))
         screen.blit(ui_level, (20, 48))
@@ -671,6 +1206,10 @@ class Game:
         screen.blit(ui_combo, (20, 144))
         screen.blit(ui_shield, (20, 176))
         screen.blit(ui_best, (20, 208))
+        for name, y in zip(HUD_LABELS, range(16, 240, 32)):
+            label = labels[name]
+            if label.changed_w:
+                drawn.append(pygame.Rect(20, y, label.changed_w, label.surf.get_height()))
 
         # Dash bar
         now_t = g["t"]
@@ -679,51 +1218,111 @@ class Game:
             remain = g["dash_cd_until"] - now_t
             dash_ready = 1.0 - clamp(remain / g["dash_cooldown"], 0.0, 1.0)
 
-        dash_label = font.render("Dash", True, BLUE)
+        dash_label = render_text(pick_font(), "Dash", BLUE)
         screen.blit(dash_label, (WIDTH - 170, 16))
-        draw_bar(WIDTH - 170, 46, 140, 18, dash_ready, BLUE)
+        drawn.append(draw_bar(screen, WIDTH - 170, 46, 140, 18, dash_ready, BLUE))
 
         # Slow indicator
         if now_t < g["slow_until"]:
             remain = g["slow_until"] - now_t
             slow01 = clamp(remain / 3.2, 0.0, 1.0)
-            slow_label = font.render("Slow", True, CYAN)
-            screen.blit(slow_label, (WIDTH - 170, 78))
-            draw_bar(WIDTH - 170, 108, 140, 18, slow01, CYAN)
+            slow_label = render_text(pick_font(), "Slow", CYAN)
+            drawn.append(screen.blit(slow_label, (WIDTH - 170, 78)))
+            drawn.append(draw_bar(screen, WIDTH - 170, 108, 140, 18, slow01, CYAN))
 
-        tip = font.render("SHIFT: Dash | P: Pause | R: Restart | M: Menu | ESC: Quit", True, (170, 170, 170))
+        tip = render_text(pick_font(), TIP_TEXT, (170, 170, 170))
         screen.blit(tip, (WIDTH // 2 - tip.get_width() // 2, HEIGHT - 36))
+        prof.lap("draw_hud")
 
         if g["paused"] and not g["game_over"]:
-            draw_text_center("PAUSED", HEIGHT // 2 - 90, use_big=True)
-            draw_text_center("Press P to Resume", HEIGHT // 2 + 10, color=GOLD_INNER)
+            self.layers.blit(screen, "PAUSE", None, PAUSE_LINES)
 
         if g["game_over"]:
-            draw_text_center("GAME OVER", HEIGHT // 2 - 120, use_big=True)
-            draw_text_center("R: Restart   M: Menu   ESC: Quit", HEIGHT // 2 - 20, color=GOLD_INNER)
-
-        # flash overlay
-        if g["flash"] > 0:
-            a = int(255 * clamp(g["flash"], 0.0, 0.25) / 0.25)
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((255, 255, 255, a))
-            screen.blit(overlay, (0, 0))
-
-        pygame.display.flip()
-
+            self.layers.blit(screen, "GAME_OVER", None, GAME_OVER_LINES)
+
+        # overlays (flash)
+        post.apply(screen, g)
+        prof.lap("draw_overlay")
+        drawn.append(prof.draw(screen))
+        prof.lap("profiler")
+
+        self.present(("PLAY", g["paused"], g["game_over"], prof.overlay), full=g["shake"] > 0 or g["flash"] > 0)
+        prof.lap("flip")
+
+    def present(self, screen_key, full=False):
+        # screen_key changes (menu <-> play, pause, game over) always flip the whole frame
+        if self.dirty is not None:
+            self.dirty.present(self.drawn, full=full or screen_key != self.last_screen)
+        elif not self.offscreen:
+            pygame.display.flip()
+        if "first_frame" not in STARTUP:
+            mark_startup("first_frame")
+        self.last_screen = screen_key
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dodge Game v2")
+    parser.add_argument("--headless", action="store_true", help="simulate without a window, uncapped")
+    add_sim_args(parser)
+    parser.add_argument("--max-particles", type=int, default=MAX_PARTICLES, help="particle pool capacity")
+    parser.add_argument(
+        "--render", choices=("flip", "dirty"), default="flip", help="present whole frames or changed regions only"
+    )
+    parser.add_argument("--star-density", type=float, default=1.0, help="starfield density multiplier")
+    parser.add_argument("--fps", type=float, default=FPS, help="render frame cap")
+    parser.add_argument("--max-catchup", type=int, default=8, help="max simulation ticks per rendered frame")
+    parser.add_argument("--startup-report", action="store_true", help="print import / display / font / first-frame times")
+    args = parser.parse_args(argv)
+    check_sim_args(parser, args)
+
+    # the same as python dodge_core.py (which runs without pygame)
+    if args.replay:
+        sys.exit(verify_replays(args.replay))
+    if args.headless:
+        simulate(args)
+        if args.startup_report:
+            print(startup_report())
+        return
+
+    game = Game(
+        vectorized=args.vectorized,
+        max_particles=args.max_particles,
+        render_mode=args.render,
+        star_density=args.star_density,
+        seed=args.seed,
+        profile_path=args.profile,
+        level=args.level,
+    )
+    if args.autopilot is not None:
+        game.input_source = Autopilot(game, args.autopilot, 1.0 / args.tick_rate, passthrough=read_keyboard)
+    if args.record:
+        game.recorder = InputRecorder(args.record, game, 1.0 / args.tick_rate)
 
-def main():
-    game = Game()
+    loop = FixedStep(args.tick_rate, args.max_catchup)
+    clock = pygame.time.Clock()
+    prof = game.profiler
+    report = args.startup_report
 
     while True:
-        dt = clock.tick(FPS) / 1000.0
+        frame_dt = clock.tick(args.fps) / 1000.0
+        prof.start()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 game.quit()
-
-        game.update(dt)
-        game.render()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                prof.toggle_overlay()
+        prof.lap("events")
+
+        steps, alpha = loop.advance(frame_dt)
+        for _ in range(steps):
+            game.update(loop.dt)
+        game.render(alpha)
+        prof.end(game.counts())
+        game.note_frame(frame_dt)
+        if report:
+            report = False
+            print(startup_report(), file=sys.stderr)
 
 
 if __name__ == "__main__":